@@ -0,0 +1,166 @@
+import json
+import time
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+from Cache import TTLCache
+
+logger = logging.getLogger("uvicorn")
+
+
+def compact_article(article: dict) -> dict:
+    """Keeps only the fields the frontend renders."""
+    return {
+        "title": article.get("title"),
+        "description": article.get("description"),
+        "url": article.get("url"),
+        "urlToImage": article.get("urlToImage"),
+        "author": article.get("author"),
+        "publishedAt": article.get("publishedAt"),
+        "source": {"name": (article.get("source") or {}).get("name")},
+    }
+
+
+class InvalidCursorError(ValueError):
+    """A pagination cursor that doesn't decode to one this store issued."""
+
+
+def encode_cursor(version: int, url: str, offset: int) -> str:
+    raw = json.dumps({"v": version, "after": url, "offset": offset}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[int], Optional[str], int]:
+    """Returns (snapshot version, last url served, offset); raises InvalidCursorError for a malformed cursor."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(data, dict):
+            raise ValueError
+        version = data.get("v")
+        return (int(version) if version is not None else None), data.get("after"), int(data.get("offset", 0))
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor.")
+
+
+class Snapshot:
+    """
+    Immutable, versioned list of compact articles for one (category, country, lang) feed,
+    in upstream order. A refresh builds a new version instead of editing this one.
+    """
+
+    def __init__(self, key: tuple, version: int, news_data: dict, max_articles: int):
+        by_url = {}
+        for article in news_data.get("articles", []):
+            if article.get("url") and article["url"] not in by_url:
+                by_url[article["url"]] = compact_article(article)
+        self.key = key
+        self.version = version
+        self.articles: list[dict] = list(by_url.values())[:max_articles]
+        self.positions: dict[str, int] = {a["url"]: i for i, a in enumerate(self.articles)}
+        self.fetched_at = time.monotonic()
+
+    def page(self, start: int, size: int) -> list[dict]:
+        return self.articles[start:start + size]
+
+
+class ArticleStore:
+    """
+    In-memory paginated feeds keyed by (category, country, lang).
+    Pages are served from the newest snapshot; a snapshot older than refresh_after is
+    replaced in the background while readers keep getting the current one. Cursors pin
+    the snapshot version their first page came from, so offsets stay stable while paging
+    even though the front page moves on; recent versions are kept for max_age.
+    """
+
+    def __init__(self, fetch: Callable[..., dict], refresh_after: float = 300.0, max_age: float = 3600.0,
+                 maxsize: int = 64, max_articles: int = 200, versions_per_feed: int = 8):
+        self.fetch = fetch
+        self.refresh_after = refresh_after
+        self.max_articles = max_articles
+        self._snapshots = TTLCache(maxsize=maxsize, ttl=max_age, name="news_snapshots")
+        self._versions = TTLCache(maxsize=maxsize * versions_per_feed, ttl=max_age, name="news_snapshot_versions")
+        self._next_version = 1
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="news-refresh")
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+
+    def _build(self, key: tuple, news_data: dict) -> Snapshot:
+        with self._lock:
+            version = self._next_version
+            self._next_version += 1
+        snapshot = Snapshot(key, version, news_data, self.max_articles)
+        self._versions.set(version, snapshot)
+        return snapshot
+
+    def _load(self, key: tuple) -> Snapshot:
+        return self._build(key, self.fetch(*key))
+
+    def refresh(self, key: tuple) -> Snapshot:
+        """Fetches upstream now and publishes it as the key's newest snapshot."""
+        return self.ingest(key, self.fetch(*key))
+
+    def ingest(self, key: tuple, news_data: dict) -> Snapshot:
+        """Publishes a payload fetched elsewhere (e.g. by a bulk ingestion job) as the key's newest snapshot."""
+        snapshot = self._build(key, news_data)
+        self._snapshots.set(key, snapshot)
+        return snapshot
+
+    def _refresh_in_background(self, key: tuple):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(key)
+                self.background_refreshes += 1
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Background refresh of {key} failed, serving the previous snapshot: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def get_snapshot(self, key: tuple) -> Snapshot:
+        snapshot = self._snapshots.get_or_load(key, lambda: self._load(key))
+        if time.monotonic() - snapshot.fetched_at >= self.refresh_after:
+            self._refresh_in_background(key)
+        return snapshot
+
+    def get_page(self, key: tuple, page: int = 1, page_size: int = 8, cursor: Optional[str] = None) -> dict:
+        if cursor:
+            version, after_url, offset = decode_cursor(cursor)
+            pinned = self._versions.get(version) if version is not None else None
+            if pinned is not None and pinned.key == key:
+                snapshot, start = pinned, max(0, offset)
+            else:
+                # The pinned version expired: continue in the newest one after the last article served.
+                snapshot = self.get_snapshot(key)
+                start = snapshot.positions[after_url] + 1 if after_url in snapshot.positions else offset
+        else:
+            snapshot = self.get_snapshot(key)
+            start = max(0, page - 1) * page_size
+        articles = snapshot.page(start, page_size)
+        total = len(snapshot.articles)
+        end = start + len(articles)
+        next_cursor = encode_cursor(snapshot.version, articles[-1]["url"], end) if articles and end < total else None
+        return {"articles": articles, "totalResults": total, "nextCursor": next_cursor}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            **self._snapshots.stats(),
+            "refresh_after": self.refresh_after,
+            "background_refreshes": self.background_refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
@@ -0,0 +1,432 @@
+import os
+import json
+import time
+import tempfile
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class _Flight:
+    """A single in-progress load that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL, a size bound and LRU eviction.
+    Concurrent misses for the same key are collapsed into a single call to the loader.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0, name: str = "cache"):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Hashable):
+        """Returns (found, value). Must be called with the lock held."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stale += 1
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+        return value if found else default
+
+    def get_many(self, keys: list) -> dict:
+        """Returns {key: value} for the keys that are cached and live."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                hit, value = self._lookup(key)
+                if hit:
+                    found[key] = value
+        return found
+
+    def set_many(self, items: dict):
+        for key, value in items.items():
+            self.set(key, value)
+
+    def contains(self, key: Hashable) -> bool:
+        """Checks for a live entry without touching the counters or the LRU order."""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]):
+        """Returns the cached value for key, calling loader() at most once per miss across threads."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not is_leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            self.set(key, value)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SQLiteCache:
+    """
+    Persistent key -> JSON value cache in a SQLite file, with a TTL and a size bound.
+    Has the same get/set/stats interface as TTLCache so either can back a cache.
+    Least recently accessed rows are evicted once maxsize is exceeded.
+    Reads never commit: access times are buffered in memory and written with the next
+    write, or once access_flush_every keys have piled up.
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000, ttl: float = 7 * 24 * 3600, name: str = "cache",
+                 access_flush_every: int = 256):
+        self.path = path
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+        self.access_flush_every = max(1, access_flush_every)
+        self._lock = threading.Lock()
+        self._accessed: dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps this crash-safe; losing the last commits on power loss only costs cache entries.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            value, created_at = row
+            if created_at + self.ttl <= now:
+                # Left for the next set() of this key, or for eviction.
+                self.stale += 1
+                return default
+            self._touch([key], now)
+            self.hits += 1
+        return json.loads(value)
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Returns {key: value} for the keys that are cached and live, in one query per 500 keys."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            expired = []
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM cache WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if created_at + self.ttl <= now:
+                        expired.append(key)
+                    else:
+                        found[key] = json.loads(value)
+            self._touch(found, now)
+            self.hits += len(found)
+            self.stale += len(expired)
+            self.misses += len(keys) - len(found) - len(expired)
+        return found
+
+    def _touch(self, keys, now: float):
+        """Records reads for LRU eviction. Must be called with the lock held."""
+        for key in keys:
+            self._accessed[key] = now
+        if len(self._accessed) >= self.access_flush_every:
+            self._flush_access_times()
+            self._conn.commit()
+
+    def _flush_access_times(self):
+        """Writes buffered access times without committing. Must be called with the lock held."""
+        if self._accessed:
+            self._conn.executemany("UPDATE cache SET accessed_at = ? WHERE key = ?",
+                                   [(at, key) for key, at in self._accessed.items()])
+            self._accessed.clear()
+
+    def set_many(self, items: dict):
+        now = time.time()
+        with self._lock:
+            self._flush_access_times()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(value), now, now) for key, value in items.items()]
+            )
+            self._evict_overflow()
+            self._conn.commit()
+
+    def contains(self, key: str) -> bool:
+        """Checks for a live row without touching the counters or the access time."""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] + self.ttl > time.time()
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._flush_access_times()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._evict_overflow()
+            self._conn.commit()
+
+    def _evict_overflow(self):
+        """Deletes the least recently accessed rows beyond maxsize. Must be called with the lock held."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        overflow = count - self.maxsize
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._accessed.clear()
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_access_times()
+            self._conn.commit()
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "name": self.name,
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Collapses concurrent identical coroutine calls on the event loop into one.
+    The shared call runs as its own task, so cancelling any caller (the first one
+    included) leaves it running for the others.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.shared = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+
+class DiskFileCache:
+    """
+    Directory of cached files named by key, bounded by total size in bytes.
+    Hits refresh the file's mtime; the least recently used files are removed first.
+    The total is tracked as files are committed, so the directory is only scanned at
+    startup and when it has to evict.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, suffix: str = "", name: str = "cache"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.name = name
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        entries = self._entries()
+        self._files = len(entries)
+        self._bytes = sum(size for _, size, _ in entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached file's path, or None on a miss."""
+        path = self.path_for(key)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return path
+
+    def open_writer(self, key: str):
+        """Opens a temporary file to be committed into the cache with commit() or dropped with discard()."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".part")
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def commit(self, key: str, tmp_path: str) -> str:
+        path = self.path_for(key)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = None
+            os.replace(tmp_path, path)
+            self._files += replaced is None
+            self._bytes += size - (replaced or 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+        return path
+
+    def discard(self, tmp_path: str):
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._files, self._bytes = 0, 0
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.suffix) and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        """Removes the least recently used files until under max_bytes. Must be called with the lock held."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        files = len(entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            files -= 1
+            self.evictions += 1
+        # Re-based on the scan, so any drift in the running totals is corrected here.
+        self._files, self._bytes = files, total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "files": self._files,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
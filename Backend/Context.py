@@ -0,0 +1,71 @@
+import re
+import math
+from typing import Callable
+
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting prompts."""
+    return math.ceil(len(text) / 4)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text or "") if s.strip()]
+
+
+def chunk_sentences(sentences: list[str], max_tokens: int) -> list[str]:
+    """Groups consecutive sentences into chunks of at most max_tokens (a longer sentence stands alone)."""
+    chunks, current, current_tokens = [], [], 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def build_context(query_embedding: list[float], articles: list[dict], encode: Callable[[list[str]], list],
+                  budget_tokens: int = 1500, chunk_tokens: int = 80) -> tuple[str, int]:
+    """
+    Packs the article chunks most similar to the query into budget_tokens.
+    All chunks are embedded in one encode call and scored with one matrix product.
+    Returns (context, tokens_used); chosen chunks keep their article and reading order.
+    """
+    chunks = []  # (article index, chunk index, text)
+    for a_idx, article in enumerate(articles):
+        # Chunk-level search already narrowed long articles down to their matching passages.
+        body = " ".join(article.get('passages') or []) or article.get('content') or article.get('description') or ''
+        for c_idx, text in enumerate(chunk_sentences(split_sentences(body), chunk_tokens)):
+            chunks.append((a_idx, c_idx, text))
+    if not chunks:
+        return "", 0
+
+    vectors = np.asarray(encode([text for _, _, text in chunks]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+    scores = vectors @ query
+
+    headers = {a_idx: f"{articles[a_idx].get('title', 'No Title')}:" for a_idx, _, _ in chunks}
+    chosen: dict[int, list[tuple[int, str]]] = {}
+    used = 0
+    for i in np.argsort(-scores):
+        a_idx, c_idx, text = chunks[i]
+        cost = estimate_tokens(text) + (0 if a_idx in chosen else estimate_tokens(headers[a_idx]))
+        if used + cost > budget_tokens:
+            continue
+        chosen.setdefault(a_idx, []).append((c_idx, text))
+        used += cost
+
+    sections = []
+    for a_idx in sorted(chosen):
+        passage = " ".join(text for _, text in sorted(chosen[a_idx]))
+        sections.append(f"{headers[a_idx]} {passage}")
+    return "\n\n".join(sections), used
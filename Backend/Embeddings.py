@@ -0,0 +1,162 @@
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+logger = logging.getLogger("uvicorn")
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query. all-MiniLM-L6-v2 is uncased, so case and spacing don't change the vector."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbedder:
+    """
+    Bounded LRU cache of normalized query text -> embedding.
+    Cache misses from concurrent callers are collected for up to max_wait seconds
+    and encoded together in one call; identical in-flight queries share a result.
+    """
+
+    def __init__(self, encode: Callable[[list[str]], list[list[float]]], maxsize: int = 1024,
+                 max_batch: int = 32, max_wait: float = 0.005):
+        self.encode = encode
+        self.maxsize = max(1, maxsize)
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._cache: "OrderedDict[str, list[float]]" = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._requests: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.encoded = 0
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+            self._thread.start()
+
+    def embed(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self._requests.put(key)
+                self._ensure_worker()
+        return future.result()
+
+    def _collect_batch(self) -> list[str]:
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                vectors = self.encode(batch)
+            except Exception as e:
+                logger.error(f"Query embedding batch of {len(batch)} failed: {e}")
+                with self._lock:
+                    futures = [self._inflight.pop(key) for key in batch]
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.encoded += len(batch)
+                futures = []
+                for key, vector in zip(batch, vectors):
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                    futures.append((self._inflight.pop(key), vector))
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+            for future, vector in futures:
+                future.set_result(vector)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "batches": self.batches,
+                "avg_batch_size": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+class OnnxEncoder:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with the int8-quantized export from the model's Hub repo.
+    Mirrors the sentence-transformers pipeline (256-token truncation, mean pooling, L2 norm)
+    without importing torch, so startup is faster and CPU encodes are several times cheaper.
+    """
+
+    def __init__(self, model_id: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 file_name: str = "onnx/model_qint8_avx512_vnni.onnx", max_length: int = 256, threads: int = 0):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_id, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            hf_hub_download(model_id, file_name), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: list[str], batch_size: int = 64) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            feeds = {
+                "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            mask = feeds["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled / (np.linalg.norm(pooled, axis=1, keepdims=True) + 1e-12))
+        if not outputs:
+            return np.zeros((0, 384), dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32)
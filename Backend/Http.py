@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+import httpx
+
+import Metrics
+
+logger = logging.getLogger("uvicorn")
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    return {
+        "timeout": httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+        "http2": HTTP2_AVAILABLE,
+    }
+
+
+def get_client() -> httpx.Client:
+    """Process-wide pooled sync client (keep-alive, timeouts, HTTP/2 when h2 is installed)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(**_client_options())
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Process-wide pooled async client with the same settings as get_client()."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(**_client_options())
+    return _async_client
+
+
+def histogram(upstream: str) -> Metrics.LatencyHistogram:
+    return Metrics.histogram("newz_upstream_request_seconds", "upstream", upstream)
+
+
+def observe(upstream: str, seconds: float, failed: bool):
+    histogram(upstream).observe(seconds, error=failed)
+    Metrics.record_timing(f"upstream-{upstream}", seconds)
+
+
+def request(upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request on the shared client and records its latency under upstream."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = get_client().request(method, url, **kwargs)
+        failed = response.is_error
+        return response
+    finally:
+        observe(upstream, time.perf_counter() - started, failed)
+
+
+async def request_async(upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """Async counterpart of request()."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = await get_async_client().request(method, url, **kwargs)
+        failed = response.is_error
+        return response
+    finally:
+        observe(upstream, time.perf_counter() - started, failed)
+
+
+async def close_clients():
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def stats() -> dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "upstreams": {name: h.snapshot() for name, h in Metrics.family("newz_upstream_request_seconds").items()},
+    }
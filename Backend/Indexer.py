@@ -0,0 +1,131 @@
+import time
+import queue
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger("uvicorn")
+
+
+class IndexingQueue:
+    """
+    A single long-lived indexing worker behind a bounded queue.
+    Articles submitted by requests are merged, deduplicated by source_url and
+    handed to the sink in large batches once either the size or the time
+    threshold is reached. When the queue is full, new submissions are dropped
+    (and counted) instead of piling up in the API process.
+    """
+
+    def __init__(self, sink: Callable[[list[dict]], None], maxsize: int = 256,
+                 batch_size: int = 256, max_wait: float = 5.0):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[list[dict]]" = queue.Queue(maxsize=maxsize)
+        self._pending: dict[str, dict] = {}
+        self._pending_since = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.indexed = 0
+        self.batches = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="indexing-worker", daemon=True)
+        self._thread.start()
+        logger.info("Indexing worker started.")
+
+    def stop(self, timeout: float = 10.0):
+        """Signals the worker to drain what it already has and exit."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, articles: list[dict]) -> bool:
+        """Queues articles for indexing without blocking. Returns False if they were dropped."""
+        if not articles:
+            return True
+        try:
+            self._queue.put_nowait(articles)
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(articles)
+            logger.warning(f"Indexing queue full, dropped {len(articles)} articles.")
+            return False
+        with self._lock:
+            self.submitted += len(articles)
+        return True
+
+    def _merge(self, articles: list[dict]):
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        for item in articles:
+            url = item.get("source_url")
+            if not url:
+                continue
+            if url in self._pending:
+                self.coalesced += 1
+            self._pending[url] = item
+
+    def _flush_due(self) -> bool:
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._pending_since >= self.max_wait
+
+    def _flush(self):
+        batch = list(self._pending.values())
+        self._pending = {}
+        self._pending_since = None
+        try:
+            self.sink(batch)
+            with self._lock:
+                self.indexed += len(batch)
+                self.batches += 1
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.error(f"Indexing batch of {len(batch)} articles failed: {e}")
+
+    def _run(self):
+        while True:
+            if self._pending:
+                timeout = max(0.0, self.max_wait - (time.monotonic() - self._pending_since))
+            else:
+                timeout = 0.5
+            try:
+                self._merge(self._queue.get(timeout=timeout))
+                # Drain whatever else is already waiting so it lands in the same batch.
+                while len(self._pending) < self.batch_size:
+                    self._merge(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            if self._flush_due() or (stopping and self._pending):
+                self._flush()
+            if stopping and self._queue.empty() and not self._pending:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_maxsize": self._queue.maxsize,
+                "pending_articles": len(self._pending),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "indexed": self.indexed,
+                "batches": self.batches,
+                "failures": self.failures,
+            }
@@ -0,0 +1,115 @@
+import time
+import random
+import asyncio
+import logging
+import itertools
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import Http
+
+logger = logging.getLogger("uvicorn")
+
+NEWSAPI_TOP_HEADLINES_URL = "https://newsapi.org/v2/top-headlines"
+NEWSAPI_CATEGORIES = ["business", "entertainment", "general", "health", "science", "sports", "technology"]
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def process_articles_for_indexing(news_data):
+    articles_to_index = []
+    if news_data and "articles" in news_data:
+        for article_data in news_data["articles"]:
+            content = article_data.get("content") or article_data.get("description")
+            if not content:
+                continue
+            if "[+" in content:
+                content = content.split("[+")[0].strip()
+            articles_to_index.append({
+                "title": article_data.get("title", "No Title"),
+                "article_text": content,
+                "source_url": article_data.get("url"),
+                "author": article_data.get("author") or "Unknown",
+                "published_at": article_data.get("publishedAt") or "Unknown",
+                "source_name": article_data.get("source", {}).get("name", "Unknown"),
+                "category": article_data.get("category", "general")
+            })
+    return articles_to_index
+
+
+class IngestionJob:
+    """
+    Fetches top headlines for every (category, country, language) combination concurrently
+    over the shared pooled async client. Requests to the same host are capped by a semaphore and
+    retried with exponential backoff; each finished source is handed to on_result right away.
+    """
+
+    def __init__(self, api_key: str, on_result: Callable[[tuple, dict], None],
+                 categories: list[str], countries: list[Optional[str]], languages: list[Optional[str]],
+                 per_host_limit: int = 4, max_retries: int = 3, backoff: float = 0.5):
+        self.api_key = api_key
+        self.on_result = on_result
+        self.categories = categories
+        self.countries = countries
+        self.languages = languages
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def _get_json(self, url: str, params: dict) -> tuple[dict, int]:
+        """GETs url with retries. Returns (payload, attempts)."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self._host_limit(url):
+                    response = await Http.request_async("newsapi", "GET", url, params=params)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response.json(), attempt
+                error = httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            if attempt > self.max_retries:
+                raise error
+            delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random())
+            await asyncio.sleep(delay)
+
+    async def _ingest_one(self, key: tuple) -> dict:
+        category, country, lang = key
+        params = {"apiKey": self.api_key, "category": category}
+        if country:
+            params["country"] = country
+        if lang:
+            params["language"] = lang
+
+        started = time.perf_counter()
+        report = {"category": category, "country": country, "lang": lang}
+        try:
+            news_data, attempts = await self._get_json(NEWSAPI_TOP_HEADLINES_URL, params)
+            self.on_result(key, news_data)
+            report.update(status="ok", articles=len(news_data.get("articles", [])), attempts=attempts)
+        except Exception as e:
+            logger.warning(f"Ingestion of {key} failed: {e}")
+            report.update(status="error", articles=0, error=str(e))
+        report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+
+    async def run(self) -> dict:
+        keys = list(itertools.product(self.categories, self.countries, self.languages))
+        started = time.perf_counter()
+        sources = await asyncio.gather(*(self._ingest_one(key) for key in keys))
+        return {
+            "sources": sources,
+            "total_articles": sum(s["articles"] for s in sources),
+            "failed_sources": sum(1 for s in sources if s["status"] != "ok"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
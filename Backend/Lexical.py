@@ -0,0 +1,107 @@
+import re
+import math
+import threading
+from collections import Counter
+
+from TimeFilter import published_epoch
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9.$&'-]*[a-z0-9]|[a-z0-9]", re.IGNORECASE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; keeps tickers and names like 'S&P', 'GPT-4' or 'U.S' in one piece."""
+    return [t.lower() for t in TOKEN.findall(text or "")]
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring over title + article_text.
+    Documents are keyed by source_url and can be added or replaced incrementally.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}
+        self._lengths: dict[str, int] = {}
+        self._docs: dict[str, dict] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove(self, url: str):
+        for term in self._docs[url]["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(url, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(url)
+        del self._docs[url]
+
+    def add_many(self, articles: list[dict]):
+        """Indexes articles shaped like insert_articles input (title, article_text, source_url, published_at)."""
+        with self._lock:
+            for item in articles:
+                url = item.get("source_url")
+                if not url:
+                    continue
+                if url in self._docs:
+                    self._remove(url)
+                counts = Counter(tokenize(f"{item.get('title', '')} {item.get('article_text', '')}"))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[url] = tf
+                length = sum(counts.values())
+                self._lengths[url] = length
+                self._total_length += length
+                self._docs[url] = {
+                    "terms": list(counts),
+                    "title": item.get("title"),
+                    "content": item.get("article_text"),
+                    "published_at": item.get("published_at"),
+                    "published_ts": published_epoch(item.get("published_at")),
+                }
+
+    def search(self, query: str, top_k: int = 10, since=None, until=None) -> list[dict]:
+        """Returns the top_k BM25 hits, shaped like search_similar_articles results."""
+        terms = set(tokenize(query))
+        since_ts = int(since.timestamp()) if since else None
+        until_ts = int(until.timestamp()) if until else None
+        with self._lock:
+            n = len(self._docs)
+            if not n or not terms:
+                return []
+            avgdl = self._total_length / n
+            scores: dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for url, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[url] / avgdl)
+                    scores[url] = scores.get(url, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            hits = []
+            for url, score in sorted(scores.items(), key=lambda kv: kv[1], reverse=True):
+                doc = self._docs[url]
+                if since_ts is not None and doc["published_ts"] < since_ts:
+                    continue
+                if until_ts is not None and doc["published_ts"] >= until_ts:
+                    continue
+                hits.append({
+                    "title": doc["title"],
+                    "content": doc["content"],
+                    "url": url,
+                    "published_at": doc["published_at"],
+                    "bm25_score": score,
+                })
+                if len(hits) >= top_k:
+                    break
+            return hits
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._docs), "terms": len(self._postings)}
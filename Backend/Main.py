@@ -1,28 +1,104 @@
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from deep_translator import GoogleTranslator
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from bs4 import BeautifulSoup
 from gtts import gTTS
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from pymilvus import Collection
-import os, requests, json, logging, io, re
+import os, httpx, json, logging, re, asyncio, functools, hashlib, time, contextvars
 import google.generativeai as genai
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 from Milvus import (
-    create_milvus_collection_if_not_exists,
+    CHUNK_COLLECTION_NAME,
+    CHUNK_INDEXING,
+    HYBRID_SEARCH,
+    VECTOR_BACKEND,
+    sync_replicas,
+    close_local_collections,
+    lexical_index,
+    bootstrap_lexical_index,
+    embedding_ready,
+    embedding_status,
+    warm_up_embedding_model,
+    get_collection,
+    run_with_collection,
     search_similar_articles,
-    insert_articles
+    insert_articles,
+    generate_embeddings,
+    query_embedder
 )
+from Cache import TTLCache, SQLiteCache, AsyncSingleFlight, DiskFileCache
+from VectorStore import StoreLockedError
+from Indexer import IndexingQueue
+from Prewarm import SummaryPrewarmer
+from ArticleStore import ArticleStore, InvalidCursorError
+from Rerank import mmr_rerank, reciprocal_rank_fusion
+from Context import build_context
+from TimeFilter import parse_time_filter
+from Ingestion import IngestionJob, NEWSAPI_CATEGORIES, NEWSAPI_TOP_HEADLINES_URL, process_articles_for_indexing
+import Http
+import Metrics
 
 load_dotenv()
 
 # --- Config ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "300"))
+NEWS_CACHE_MAXSIZE = int(os.getenv("NEWS_CACHE_MAXSIZE", "64"))
+NEWS_SNAPSHOT_MAX_AGE = float(os.getenv("NEWS_SNAPSHOT_MAX_AGE", "3600"))
+NEWS_SNAPSHOT_MAX_ARTICLES = int(os.getenv("NEWS_SNAPSHOT_MAX_ARTICLES", "200"))
+INDEX_QUEUE_MAXSIZE = int(os.getenv("INDEX_QUEUE_MAXSIZE", "256"))
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "256"))
+INDEX_FLUSH_INTERVAL = float(os.getenv("INDEX_FLUSH_INTERVAL", "5"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+RAG_RETRIEVAL_TIMEOUT = float(os.getenv("RAG_RETRIEVAL_TIMEOUT", "10"))
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "30"))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+SUMMARY_CACHE_BACKEND = os.getenv("SUMMARY_CACHE_BACKEND", "sqlite")  # "sqlite" or "memory"
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(os.path.dirname(__file__), "summary_cache.sqlite3"))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAXSIZE = int(os.getenv("SUMMARY_CACHE_MAXSIZE", "20000"))
+# Bump whenever the summary prompt changes so stale summaries are not served.
+SUMMARY_PROMPT_VERSION = "1"
+SUMMARY_PREWARM_ENABLED = os.getenv("SUMMARY_PREWARM_ENABLED", "false").lower() == "true"
+SUMMARY_PREWARM_TOP_N = int(os.getenv("SUMMARY_PREWARM_TOP_N", "5"))
+SUMMARY_PREWARM_CONCURRENCY = int(os.getenv("SUMMARY_PREWARM_CONCURRENCY", "2"))
+SUMMARY_PREWARM_PER_MINUTE = int(os.getenv("SUMMARY_PREWARM_PER_MINUTE", "30"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(os.path.dirname(__file__), "translation_cache.sqlite3"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+TRANSLATION_CACHE_MAXSIZE = int(os.getenv("TRANSLATION_CACHE_MAXSIZE", "200000"))
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "8"))
+TRANSLATION_CHUNK_SIZE = int(os.getenv("TRANSLATION_CHUNK_SIZE", "4"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "15"))
+# Socket timeout of each upstream translation call; a chunk makes up to TRANSLATION_CHUNK_SIZE of them.
+TRANSLATION_REQUEST_TIMEOUT = float(os.getenv("TRANSLATION_REQUEST_TIMEOUT", "5"))
+CACHE_WORKERS = int(os.getenv("CACHE_WORKERS", "4"))
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", "5"))
+INGEST_CATEGORIES = os.getenv("INGEST_CATEGORIES", ",".join(NEWSAPI_CATEGORIES)).split(",")
+INGEST_COUNTRIES = os.getenv("INGEST_COUNTRIES", "us").split(",")
+INGEST_LANGUAGES = os.getenv("INGEST_LANGUAGES", "en").split(",")
+INGEST_PER_HOST_LIMIT = int(os.getenv("INGEST_PER_HOST_LIMIT", "4"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+RAG_OVERFETCH_FACTOR = int(os.getenv("RAG_OVERFETCH_FACTOR", "4"))
+RAG_MMR_DIVERSITY = float(os.getenv("RAG_MMR_DIVERSITY", "0.3"))
+RAG_RECENCY_WEIGHT = float(os.getenv("RAG_RECENCY_WEIGHT", "0.1"))
+RAG_RECENCY_HALF_LIFE_HOURS = float(os.getenv("RAG_RECENCY_HALF_LIFE_HOURS", "72"))
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+RAG_CONTEXT_CHUNK_TOKENS = int(os.getenv("RAG_CONTEXT_CHUNK_TOKENS", "80"))
+# Adds a Server-Timing header with per-stage durations to every response.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
 REACT_BUILD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "dist"))
 
 LANGUAGE_MAP = {
@@ -32,12 +108,71 @@ LANGUAGE_MAP = {
     'es': 'Spanish',
     'fr': 'French'
 }
+SUMMARY_PREWARM_LANGUAGES = [
+    lang.strip() for lang in os.getenv("SUMMARY_PREWARM_LANGUAGES", ",".join(LANGUAGE_MAP)).split(",")
+    if lang.strip() in LANGUAGE_MAP
+]
 
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
 logger = logging.getLogger("uvicorn")
 
+# Paginated top-headlines snapshots keyed by (category, country, lang), so infinite
+# scroll pages are served from memory and NewsAPI is only hit to refresh them.
+article_store = ArticleStore(
+    lambda category, country, lang: fetch_and_index_news(category, country, lang),
+    refresh_after=NEWS_CACHE_TTL,
+    max_age=NEWS_SNAPSHOT_MAX_AGE,
+    maxsize=NEWS_CACHE_MAXSIZE,
+    max_articles=NEWS_SNAPSHOT_MAX_ARTICLES
+)
+
+# Summaries keyed by (article text, language, prompt version), shared by all readers.
+if SUMMARY_CACHE_BACKEND == "memory":
+    summary_cache = TTLCache(maxsize=SUMMARY_CACHE_MAXSIZE, ttl=SUMMARY_CACHE_TTL, name="summary")
+else:
+    summary_cache = SQLiteCache(SUMMARY_CACHE_PATH, maxsize=SUMMARY_CACHE_MAXSIZE, ttl=SUMMARY_CACHE_TTL, name="summary")
+summary_flight = AsyncSingleFlight()
+
+# Translation memory keyed by (text, target language), persisted across restarts.
+translation_cache = SQLiteCache(
+    TRANSLATION_CACHE_PATH, maxsize=TRANSLATION_CACHE_MAXSIZE, ttl=TRANSLATION_CACHE_TTL, name="translation"
+)
+translation_stats = {"upstream_calls": 0, "upstream_texts": 0, "failed_texts": 0}
+
+# Synthesized MP3s keyed by (language, title, summary), evicted LRU by total size.
+audio_cache = DiskFileCache(TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, suffix=".mp3", name="tts")
+
+# Optional: summarize the top headlines of each fresh fetch ahead of the clicks.
+summary_prewarmer = SummaryPrewarmer(
+    lambda text, language: get_or_create_summary(text, language),
+    lambda text, language: run_blocking(cache_executor, CACHE_TIMEOUT, summary_cache.contains, summary_cache_key(text, language)),
+    languages=SUMMARY_PREWARM_LANGUAGES,
+    top_n=SUMMARY_PREWARM_TOP_N,
+    concurrency=SUMMARY_PREWARM_CONCURRENCY,
+    per_minute=SUMMARY_PREWARM_PER_MINUTE
+)
+# Report of the last /api/trigger-indexing run, and the task while one is running.
+ingestion_state = {"task": None, "last_report": None}
+
+# Set at startup so sync handlers running in the threadpool can schedule pre-warming.
+main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# One long-lived worker merges articles from all requests into large upsert batches.
+indexing_queue = IndexingQueue(
+    insert_articles,
+    maxsize=INDEX_QUEUE_MAXSIZE,
+    batch_size=INDEX_BATCH_SIZE,
+    max_wait=INDEX_FLUSH_INTERVAL
+)
+
+# Blocking work (Milvus + embedding, gTTS, SQLite caches) runs on dedicated pools, never on the event loop.
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+translation_executor = ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS, thread_name_prefix="translate")
+cache_executor = ThreadPoolExecutor(max_workers=CACHE_WORKERS, thread_name_prefix="cache")
+
 app = FastAPI(
     title="News API",
     description="A news API service with summarization, translation, and RAG search",
@@ -54,6 +189,25 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """Records per-route latency and, with SERVER_TIMING on, returns the request's stage timings."""
+    token = Metrics.start_request_timing() if SERVER_TIMING else None
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = await call_next(request)
+        failed = response.status_code >= 500
+    finally:
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        Metrics.histogram("newz_request_duration_seconds", "route", getattr(route, "path", "unmatched")).observe(elapsed, error=failed)
+        timings = Metrics.finish_request_timing(token) if token is not None else None
+    if timings is not None:
+        response.headers["Server-Timing"] = ", ".join(filter(None, [timings, f"total;dur={elapsed * 1000:.1f}"]))
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
 # --- Pydantic Models ---
 class TranslationRequest(BaseModel):
     texts: list[str]
@@ -72,28 +226,22 @@ class RAGSearchRequest(BaseModel):
     query: str
 
 # --- Helper Functions ---
-def process_articles_for_indexing(news_data):
-    articles_to_index = []
-    if news_data and "articles" in news_data:
-        for article_data in news_data["articles"]:
-            content = article_data.get("content") or article_data.get("description")
-            if not content:
-                continue
-            if "[+" in content:
-                content = content.split("[+")[0].strip()
-            articles_to_index.append({
-                "title": article_data.get("title", "No Title"),
-                "article_text": content,
-                "source_url": article_data.get("url"),
-                "author": article_data.get("author") or "Unknown",
-                "published_at": article_data.get("publishedAt") or "Unknown",
-                "source_name": article_data.get("source", {}).get("name", "Unknown"),
-                "category": article_data.get("category", "general")
-            })
-    return articles_to_index
+async def run_blocking(executor: ThreadPoolExecutor, timeout: float, func, *args, **kwargs):
+    """Runs a blocking call on the given executor without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry the request's context over so stage timings recorded in the worker reach Server-Timing.
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+
+async def generate_text(prompt: str, timeout: float = GEMINI_TIMEOUT) -> str:
+    """Calls Gemini through its async client and returns the stripped response text."""
+    model = genai.GenerativeModel('gemini-2.0-flash')
+    with Metrics.timed("generate"):
+        response = await asyncio.wait_for(model.generate_content_async(prompt), timeout)
+    return response.text.strip()
 
 # --- NEW: Refactored logic for fetching and indexing news ---
-def fetch_and_index_news(background_tasks: BackgroundTasks, category: str = "general", country: Optional[str] = None, lang: Optional[str] = 'en'):
+def fetch_and_index_news(category: str = "general", country: Optional[str] = None, lang: Optional[str] = 'en'):
     if not NEWS_API_KEY:
         raise HTTPException(status_code=500, detail="NEWS_API_KEY is not configured.")
     api_params = {"apiKey": NEWS_API_KEY, "category": category}
@@ -101,79 +249,255 @@ def fetch_and_index_news(background_tasks: BackgroundTasks, category: str = "gen
         api_params['country'] = country
     if lang:
         api_params['language'] = lang
-    
+
     try:
-        response = requests.get("https://newsapi.org/v2/top-headlines", params=api_params)
+        response = Http.request("newsapi", "GET", NEWSAPI_TOP_HEADLINES_URL, params=api_params)
         response.raise_for_status()
         news_data = response.json()
-        articles_to_index = process_articles_for_indexing(news_data)
-        if articles_to_index:
-            background_tasks.add_task(insert_articles, articles_to_index)
-            logger.info(f"Queued {len(articles_to_index)} articles from '{category}' for background indexing.")
-        return news_data
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: the provider answered with a body that isn't JSON.
         logger.error(f"Failed to fetch news from NewsAPI: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch news from the provider.")
+    handle_fetched_news(news_data, category)
+    return news_data
+
+def handle_fetched_news(news_data: dict, category: str):
+    """Feeds a fresh NewsAPI payload into the indexing queue and, if enabled, summary pre-warming."""
+    articles_to_index = process_articles_for_indexing(news_data)
+    if articles_to_index and indexing_queue.submit(articles_to_index):
+        logger.info(f"Queued {len(articles_to_index)} articles from '{category}' for background indexing.")
+    if SUMMARY_PREWARM_ENABLED and GEMINI_API_KEY and main_loop is not None:
+        asyncio.run_coroutine_threadsafe(
+            summary_prewarmer.prewarm(news_data.get("articles", []), category), main_loop
+        )
 
 # --- Startup ---
 @app.on_event("startup")
 async def startup_event():
+    global main_loop
     logger.info("=== FastAPI App Starting ===")
+    main_loop = asyncio.get_running_loop()
+    # Load and warm the embedding model off the event loop; /api/ready reports when it's done.
+    main_loop.run_in_executor(retrieval_executor, warm_up_embedding_model)
     try:
-        # Re-enabling the Milvus connection
-        create_milvus_collection_if_not_exists()
+        # Connect, create if needed and load the collection once for the whole process
+        get_collection()
+        if CHUNK_INDEXING:
+            get_collection(CHUNK_COLLECTION_NAME)
+        if HYBRID_SEARCH:
+            main_loop.run_in_executor(retrieval_executor, bootstrap_lexical_index)
+        if VECTOR_BACKEND == "replica":
+            main_loop.run_in_executor(retrieval_executor, sync_replicas)
+    except StoreLockedError:
+        # Another process owns the local store; serving without it would only fail later.
+        raise
     except Exception as e:
         logger.error(f"Startup init failed: {e}")
+    indexing_queue.start()
     logger.info("Application startup complete.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    indexing_queue.stop()
+    article_store.shutdown()
+    retrieval_executor.shutdown(wait=False)
+    tts_executor.shutdown(wait=False)
+    translation_executor.shutdown(wait=False)
+    cache_executor.shutdown(wait=True)
+    for cache in (summary_cache, translation_cache):
+        if isinstance(cache, SQLiteCache):
+            cache.close()
+    close_local_collections()
+    await Http.close_clients()
+
 # --- API Routes ---
+def translation_cache_key(text: str, target_lang: str) -> str:
+    return hashlib.sha256(f"{target_lang}\x1f{text}".encode("utf-8")).hexdigest()
+
+class PooledGoogleTranslator(GoogleTranslator):
+    """
+    deep_translator's Google translator, but requests go through the pooled Http client with a
+    socket timeout; the library's own requests.get has none, so a hung call would hold its
+    pool thread forever. Parses the page the same way deep_translator 1.11 does.
+    """
+
+    def translate(self, text: str, **kwargs) -> str:
+        text = text.strip()
+        if not text or self._same_source_target():
+            return text
+        response = Http.request(
+            "google-translate", "GET", self._base_url,
+            params={"tl": self._target, "sl": self._source, self.payload_key: text},
+            timeout=httpx.Timeout(TRANSLATION_REQUEST_TIMEOUT, connect=Http.HTTP_CONNECT_TIMEOUT)
+        )
+        if response.status_code == 429:
+            raise TooManyRequests()
+        if response.is_error:
+            raise RequestError()
+        soup = BeautifulSoup(response.text, "html.parser")
+        element = soup.find(self._element_tag, self._element_query) or soup.find(self._element_tag, self._alt_element_query)
+        if not element:
+            raise TranslationNotFound(text)
+        return element.get_text(strip=True)
+
+def translate_chunk(texts: list[str], target_lang: str) -> list[Optional[str]]:
+    """Translates texts one by one with a shared translator; a failed text becomes None."""
+    translator = PooledGoogleTranslator(source='auto', target=target_lang)
+    results = []
+    for text in texts:
+        try:
+            results.append(translator.translate(text))
+        except Exception as e:
+            logger.warning(f"Translation of one text failed, keeping the original: {e}")
+            results.append(None)
+    return results
+
+async def translate_concurrently(texts: list[str], target_lang: str) -> list[Optional[str]]:
+    """
+    Splits texts into chunks translated in parallel on the translation pool.
+    A chunk that errors or times out yields None for its texts only.
+    """
+    chunks = [texts[i:i + TRANSLATION_CHUNK_SIZE] for i in range(0, len(texts), TRANSLATION_CHUNK_SIZE)]
+    translation_stats["upstream_calls"] += len(chunks)
+    translation_stats["upstream_texts"] += len(texts)
+    with Metrics.timed("translate"):
+        chunk_results = await asyncio.gather(
+            *(run_blocking(translation_executor, TRANSLATION_TIMEOUT, translate_chunk, chunk, target_lang) for chunk in chunks),
+            return_exceptions=True
+        )
+    translated = []
+    for chunk, result in zip(chunks, chunk_results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Translation chunk of {len(chunk)} texts failed: {result!r}")
+            result = [None] * len(chunk)
+        translated.extend(result)
+    # Counted here on the event loop rather than in the pool threads.
+    translation_stats["failed_texts"] += sum(t is None for t in translated)
+    return translated
+
 @app.post("/api/translate")
 async def translate_texts(request_data: TranslationRequest):
     try:
-        translator = GoogleTranslator(source='auto', target=request_data.targetLang)
-        translated_texts = translator.translate_batch(request_data.texts)
-        final_translations = [t if t else original for t, original in zip(translated_texts, request_data.texts)]
+        target = request_data.targetLang
+        keys = [translation_cache_key(text, target) for text in request_data.texts]
+        cached = await run_blocking(cache_executor, CACHE_TIMEOUT, translation_cache.get_many, keys)
+
+        # Only texts the translation memory doesn't have go upstream, once each, in one batch.
+        missing = {}
+        for key, text in zip(keys, request_data.texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            translated_texts = await translate_concurrently(list(missing.values()), target)
+            fresh = {key: t for key, t in zip(missing, translated_texts) if t}
+            await run_blocking(cache_executor, CACHE_TIMEOUT, translation_cache.set_many, fresh)
+            cached.update(fresh)
+
+        final_translations = [cached.get(key) or original for key, original in zip(keys, request_data.texts)]
         return {"translations": final_translations}
     except Exception as e:
         logger.error(f"Translation API error: {e}")
         raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
 
-# --- NEW ENDPOINT: Dedicated endpoint for triggering indexing ---
-@app.post("/api/trigger-indexing")
-async def trigger_indexing(background_tasks: BackgroundTasks):
+def ingest_result(key: tuple, news_data: dict):
+    article_store.ingest(key, news_data)
+    handle_fetched_news(news_data, key[0])
+
+async def run_ingestion():
+    job = IngestionJob(
+        NEWS_API_KEY,
+        ingest_result,
+        categories=INGEST_CATEGORIES,
+        countries=[c or None for c in INGEST_COUNTRIES],
+        languages=[l or None for l in INGEST_LANGUAGES],
+        per_host_limit=INGEST_PER_HOST_LIMIT,
+        max_retries=INGEST_MAX_RETRIES
+    )
     try:
-        # You can customize this, e.g., fetch from multiple categories
-        fetch_and_index_news(background_tasks, category="general", country="us")
-        return {"message": "Article indexing process started successfully."}
+        report = await job.run()
+        ingestion_state["last_report"] = report
+        logger.info(
+            f"Ingestion finished: {report['total_articles']} articles from {len(report['sources'])} sources "
+            f"({report['failed_sources']} failed) in {report['elapsed_ms']} ms."
+        )
     except Exception as e:
-        logger.error(f"Failed to trigger indexing: {e}")
-        # Check if the exception is an HTTPException and re-raise it
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail="Failed to trigger indexing.")
+        logger.error(f"Ingestion job failed: {e}")
+        ingestion_state["last_report"] = {"error": str(e)}
+
+# --- NEW ENDPOINT: Dedicated endpoint for triggering indexing ---
+@app.post("/api/trigger-indexing")
+async def trigger_indexing():
+    if not NEWS_API_KEY:
+        raise HTTPException(status_code=500, detail="NEWS_API_KEY is not configured.")
+    task = ingestion_state["task"]
+    if task is not None and not task.done():
+        return {"message": "Article indexing is already running."}
+    ingestion_state["task"] = asyncio.create_task(run_ingestion())
+    return {"message": "Article indexing process started successfully."}
+
+@app.get("/api/ingestion-report")
+def ingestion_report():
+    task = ingestion_state["task"]
+    return {
+        "running": task is not None and not task.done(),
+        "last_report": ingestion_state["last_report"]
+    }
 
 @app.get("/api/news")
 def get_news(
-    background_tasks: BackgroundTasks,
     category: str = "general",
     page: int = 1,
     pageSize: int = 8,
     country: Optional[str] = None,
-    lang: Optional[str] = 'en'
+    lang: Optional[str] = 'en',
+    cursor: Optional[str] = None
 ):
-    # This endpoint now uses the refactored function
-    news_data = fetch_and_index_news(background_tasks, category, country, lang)
+    # Pages come from the in-memory snapshot; pass nextCursor back for stable paging across refreshes.
+    try:
+        return article_store.get_page((category, country, lang), page=page, page_size=pageSize, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def build_summary_prompt(text: str, language: str) -> str:
+    language_name = LANGUAGE_MAP.get(language, 'English')
+    return (
+        f"You are an expert news analyst. Analyze the following article and return a single, valid JSON object. "
+        f"The content/values in the JSON MUST be in {language_name}. "
+        "The keys of the JSON object MUST be in English and use camelCase.\n\n"
+        "Required keys: summary, background, sentiment, bias, confidence, readTime, context, relevance, nextSteps, wordCount.\n\n"
+        f"Article Text: \"{text}\""
+    )
+
+def summary_cache_key(text: str, language: str) -> str:
+    """Cache key over the article text, the language and the prompt version."""
+    payload = f"{SUMMARY_PROMPT_VERSION}\x1f{language}\x1f{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def generate_summary(text: str, language: str) -> dict:
+    """Asks Gemini for the structured summary. Raises ValueError if no JSON comes back."""
+    summary_text = await generate_text(build_summary_prompt(text, language))
+
+    json_match = re.search(r'\{.*\}', summary_text, re.DOTALL)
     
-    # Pagination is handled here, after fetching
-    articles = news_data.get("articles", [])
-    start = (page - 1) * pageSize
-    end = start + pageSize
-    paginated_articles = articles[start:end]
+    if not json_match:
+        logger.error(f"Gemini response did not contain valid JSON. Full response: '{summary_text}'")
+        raise ValueError(f"The AI model did not return a valid summary. Response: {summary_text}")
+        
+    return json.loads(json_match.group(0))
 
-    return {
-        "articles": paginated_articles,
-        "totalResults": news_data.get("totalResults", 0)
-    }
+async def get_or_create_summary(text: str, language: str) -> dict:
+    """Serves a summary from the cache, generating it at most once across concurrent identical requests."""
+    key = summary_cache_key(text, language)
+    cached = await run_blocking(cache_executor, CACHE_TIMEOUT, summary_cache.get, key)
+    if cached is not None:
+        return cached
+
+    async def generate_and_store():
+        summary = await generate_summary(text, language)
+        await run_blocking(cache_executor, CACHE_TIMEOUT, summary_cache.set, key, summary)
+        return summary
+
+    return await summary_flight.run(key, generate_and_store)
 
 @app.post("/api/summary")
 async def summarize(request_data: SummaryRequest):
@@ -182,97 +506,211 @@ async def summarize(request_data: SummaryRequest):
     if not request_data.text:
         return {"summary": "No text provided"}
 
-    language_name = LANGUAGE_MAP.get(request_data.language, 'English')
-
-    prompt = (
-        f"You are an expert news analyst. Analyze the following article and return a single, valid JSON object. "
-        f"The content/values in the JSON MUST be in {language_name}. "
-        "The keys of the JSON object MUST be in English and use camelCase.\n\n"
-        "Required keys: summary, background, sentiment, bias, confidence, readTime, context, relevance, nextSteps, wordCount.\n\n"
-        f"Article Text: \"{request_data.text}\""
-    )
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        gemini_response = model.generate_content(prompt)
-        summary_text = gemini_response.text.strip()
-        
-        json_match = re.search(r'\{.*\}', summary_text, re.DOTALL)
-        
-        if not json_match:
-            logger.error(f"Gemini response did not contain valid JSON. Full response: '{summary_text}'")
-            raise ValueError(f"The AI model did not return a valid summary. Response: {summary_text}")
-            
-        return json.loads(json_match.group(0))
+        return await get_or_create_summary(request_data.text, request_data.language)
 
     except ValueError as ve:
         logger.error(f"Summarization ValueError: {ve}")
         raise HTTPException(status_code=422, detail=str(ve))
+
+    except asyncio.TimeoutError:
+        logger.error(f"Summarization timed out after {GEMINI_TIMEOUT}s")
+        raise HTTPException(status_code=504, detail="The summary took too long to generate.")
         
     except Exception as e:
         logger.error(f"Generic Summarization error: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred while generating the summary.")
 
+def tts_cache_key(title: str, summary: str, language: str) -> str:
+    payload = f"{language}\x1f{title}\x1f{summary}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def stream_tts_audio(tts_stream, first_chunk: bytes, key: str):
+    """Yields audio parts as gTTS finishes them and commits the full MP3 to the cache once complete."""
+    writer, tmp_path = audio_cache.open_writer(key)
+    completed = False
+    started = time.perf_counter()
+    try:
+        chunk = first_chunk
+        while chunk is not None:
+            writer.write(chunk)
+            yield chunk
+            chunk = await run_blocking(tts_executor, TTS_TIMEOUT, next, tts_stream, None)
+        completed = True
+    except Exception as e:
+        logger.error(f"TTS stream failed mid-way: {e}")
+    finally:
+        # Runs after the response headers went out, so it only feeds the histogram.
+        Metrics.histogram("newz_stage_duration_seconds", "stage", "tts_stream").observe(
+            time.perf_counter() - started, error=not completed
+        )
+        writer.close()
+        if completed:
+            # Committing may have to evict, which scans the cache directory; keep it off the loop.
+            try:
+                await run_blocking(tts_executor, TTS_TIMEOUT, audio_cache.commit, key, tmp_path)
+            except Exception as e:
+                logger.warning(f"Caching synthesized audio failed: {e}")
+        else:
+            audio_cache.discard(tmp_path)
+
 @app.post("/api/tts")
 async def text_to_speech(request_data: TTSRequest):
     try:
         if not request_data.title and not request_data.summary:
             raise HTTPException(status_code=400, detail="No title or summary provided")
+        key = tts_cache_key(request_data.title, request_data.summary, request_data.language)
+        headers = {"X-Audio-Key": key}
+
+        cached_path = audio_cache.get(key)
+        if cached_path:
+            return FileResponse(cached_path, media_type="audio/mpeg", headers=headers)
+
+        # gTTS splits the text at sentence punctuation and synthesizes one part per request;
+        # each part is sent as soon as it is ready instead of after the whole file.
         speech_text = f"Headline: {request_data.title}. Summary: {request_data.summary}"
-        mp3_fp = io.BytesIO()
-        gTTS(text=speech_text, lang=request_data.language).write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
-        return StreamingResponse(mp3_fp, media_type="audio/mpeg")
+        tts_stream = gTTS(text=speech_text, lang=request_data.language).stream()
+        with Metrics.timed("tts_first_chunk"):
+            first_chunk = await run_blocking(tts_executor, TTS_TIMEOUT, next, tts_stream, None)
+        if first_chunk is None:
+            raise ValueError("gTTS returned no audio.")
+        return StreamingResponse(stream_tts_audio(tts_stream, first_chunk, key), media_type="audio/mpeg", headers=headers)
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        logger.error(f"TTS timed out after {TTS_TIMEOUT}s")
+        raise HTTPException(status_code=504, detail="TTS took too long.")
     except Exception as e:
         logger.error(f"TTS failed: {e}")
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
 
+@app.get("/api/tts/{key}")
+def cached_audio(key: str):
+    """Replays previously synthesized audio by its X-Audio-Key, with HTTP range support."""
+    cached_path = audio_cache.get(key) if re.fullmatch(r"[0-9a-f]{64}", key) else None
+    if not cached_path:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    return FileResponse(cached_path, media_type="audio/mpeg")
+
+def rerank_candidates(query: str, candidates: list, top_k: int, relevance=None) -> list:
+    """Keeps top_k candidates by MMR with a recency boost and strips their embeddings."""
+    reranked = mmr_rerank(
+        query_embedder.embed(query), candidates, top_k,
+        diversity=RAG_MMR_DIVERSITY,
+        recency_weight=RAG_RECENCY_WEIGHT,
+        half_life_hours=RAG_RECENCY_HALF_LIFE_HOURS,
+        relevance=relevance
+    )
+    for article in reranked:
+        article.pop("embedding", None)
+    return reranked
+
+def build_rag_context(query: str, articles: list) -> tuple[str, int]:
+    """Embeds the query and packs the closest passages into the token budget. Runs on the retrieval pool."""
+    return build_context(
+        query_embedder.embed(query), articles, generate_embeddings,
+        budget_tokens=RAG_CONTEXT_TOKEN_BUDGET, chunk_tokens=RAG_CONTEXT_CHUNK_TOKENS
+    )
+
+def retrieve_diverse_articles(query: str, top_k: int, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+    """
+    Over-fetches top_k x RAG_OVERFETCH_FACTOR hits and keeps top_k by MMR with a recency boost,
+    so near-duplicate wire stories don't crowd out other sources. Runs on the retrieval pool.
+    """
+    candidates = search_similar_articles(
+        query, top_k=top_k * RAG_OVERFETCH_FACTOR, include_embeddings=True, since=since, until=until
+    )
+    return rerank_candidates(query, candidates, top_k)
+
+async def retrieve_hybrid_articles(query: str, top_k: int, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+    """
+    Runs the Milvus and BM25 legs concurrently on the retrieval pool, fuses them with
+    reciprocal rank fusion and diversifies the fused list with MMR.
+    Exact names and tickers that embeddings blur still surface through the lexical leg.
+    """
+    fetch_k = top_k * RAG_OVERFETCH_FACTOR
+    vector_hits, lexical_hits = await asyncio.gather(
+        run_blocking(
+            retrieval_executor, RAG_RETRIEVAL_TIMEOUT,
+            search_similar_articles, query, top_k=fetch_k, include_embeddings=True, since=since, until=until
+        ),
+        run_blocking(
+            retrieval_executor, RAG_RETRIEVAL_TIMEOUT,
+            lexical_index.search, query, top_k=fetch_k, since=since, until=until
+        )
+    )
+    fused = reciprocal_rank_fusion([vector_hits, lexical_hits], k=RAG_RRF_K)[:fetch_k]
+    if not fused:
+        return []
+    # Fused scores scaled to [0, 1] stand in for cosine relevance in MMR.
+    best = fused[0]["rrf_score"]
+    relevance = [hit["rrf_score"] / best for hit in fused]
+    return await run_blocking(retrieval_executor, RAG_RETRIEVAL_TIMEOUT, rerank_candidates, query, fused, top_k, relevance)
+
+async def retrieve_rag_context(raw_query: str):
+    """
+    Runs the retrieval half of RAG search.
+    Returns (sources, prompt, fallback_answer, context_tokens); prompt is None when there is nothing to generate from.
+    """
+    query = raw_query.strip()
+    # "past 3 days", "today", "since 2024-11-01", ... become a server-side published_ts range.
+    clean_query, since, until = parse_time_filter(query)
+
+    if not clean_query:
+         clean_query = query
+    
+    with Metrics.timed("retrieve"):
+        if HYBRID_SEARCH:
+            retrieved_articles = await retrieve_hybrid_articles(clean_query, RAG_TOP_K, since, until)
+        else:
+            retrieved_articles = await run_blocking(
+                retrieval_executor, RAG_RETRIEVAL_TIMEOUT,
+                retrieve_diverse_articles, clean_query, RAG_TOP_K, since, until
+            )
+
+    if not retrieved_articles:
+        return [], None, "I cannot find relevant articles matching your criteria.", 0
+
+    unique_articles = list({a.get('url', f"no_url_{i}"): a for i, a in enumerate(retrieved_articles)}.values())
+
+    # Only the passages closest to the query, packed into a fixed token budget.
+    with Metrics.timed("context"):
+        context, context_tokens = await run_blocking(
+            retrieval_executor, RAG_RETRIEVAL_TIMEOUT,
+            build_rag_context, clean_query, unique_articles
+        )
+
+    if not context.strip():
+        return unique_articles, None, "Retrieved articles do not have content.", 0
+
+    logger.info(f"RAG context: {context_tokens} tokens from {len(unique_articles)} articles.")
+    prompt = f"Answer the question based only on the following context. If the context is not sufficient, say so.\n\nContext:\n{context}\n\nQuestion: {raw_query}\nAnswer:"
+    return unique_articles, prompt, None, context_tokens
+
 @app.post("/api/rag-search")
 async def rag_search(request_data: RAGSearchRequest):
     try:
         if not GEMINI_API_KEY:
             raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured.")
 
-        query = request_data.query.strip()
-        if not query:
+        if not request_data.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty.")
 
-        search_expr = None
-        clean_query = query.lower()
-        
-        if "past month" in clean_query:
-            one_month_ago = datetime.now() - timedelta(days=30)
-            search_expr = f"published_at >= '{one_month_ago.isoformat()}'"
-            clean_query = clean_query.replace("past month", "").strip()
-        elif "past week" in clean_query:
-            one_week_ago = datetime.now() - timedelta(days=7)
-            search_expr = f"published_at >= '{one_week_ago.isoformat()}'"
-            clean_query = clean_query.replace("past week", "").strip()
-
-        if not clean_query:
-             clean_query = request_data.query.strip()
-        
-        retrieved_articles = search_similar_articles(clean_query, top_k=5, expr=search_expr)
-
-        if not retrieved_articles:
-            return {"answer": "I cannot find relevant articles matching your criteria.", "sources": []}
-
-        unique_articles = {a.get('url', f"no_url_{i}"): a for i, a in enumerate(retrieved_articles)}.values()
-
-        context = "\n\n".join([
-            f"{a.get('title', 'No Title')}: {a.get('content', a.get('description', 'No content'))}"
-            for a in unique_articles
-        ])
-
-        if not context.strip():
-            return {"answer": "Retrieved articles do not have content.", "sources": list(unique_articles)}
+        sources, prompt, fallback_answer, context_tokens = await retrieve_rag_context(request_data.query)
+        if prompt is None:
+            return {"answer": fallback_answer, "sources": sources}
 
-        prompt = f"Answer the question based only on the following context. If the context is not sufficient, say so.\n\nContext:\n{context}\n\nQuestion: {request_data.query}\nAnswer:"
+        answer = await generate_text(prompt)
 
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        answer = model.generate_content(prompt).text.strip()
-
-        return {"answer": answer, "sources": list(unique_articles)}
+        return {"answer": answer, "sources": sources, "usage": {"context_tokens": context_tokens}}
 
+    except asyncio.TimeoutError:
+        logger.error("RAG search timed out")
+        return {
+            "answer": "The search took too long. Please try again.",
+            "sources": [],
+            "error": "timeout"
+        }
     except Exception as e:
         logger.error(f"RAG search failed: {e}")
         return {
@@ -281,12 +719,110 @@ async def rag_search(request_data: RAGSearchRequest):
             "error": str(e)
         }
 
+def sse_event(event: str, data) -> str:
+    """Formats one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_rag_answer(raw_query: str):
+    """Yields the sources as soon as retrieval finishes, then the answer token by token."""
+    try:
+        sources, prompt, fallback_answer, context_tokens = await retrieve_rag_context(raw_query)
+        yield sse_event("sources", sources)
+        if prompt is None:
+            yield sse_event("token", {"text": fallback_answer})
+            yield sse_event("done", {})
+            return
+
+        model = genai.GenerativeModel('gemini-2.0-flash')
+        started = time.perf_counter()
+        response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), GEMINI_TIMEOUT)
+        chunks = response.__aiter__()
+        first_token = True
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), GEMINI_TIMEOUT)
+            except StopAsyncIteration:
+                break
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish-reason chunk)
+                continue
+            if text:
+                if first_token:
+                    Metrics.histogram("newz_stage_duration_seconds", "stage", "generate_first_token").observe(time.perf_counter() - started)
+                    first_token = False
+                yield sse_event("token", {"text": text})
+        Metrics.histogram("newz_stage_duration_seconds", "stage", "generate_stream").observe(time.perf_counter() - started)
+        yield sse_event("done", {"usage": {"context_tokens": context_tokens}})
+
+    except asyncio.TimeoutError:
+        logger.error("Streaming RAG search timed out")
+        yield sse_event("error", {"message": "The search took too long. Please try again."})
+    except Exception as e:
+        logger.error(f"Streaming RAG search failed: {e}")
+        yield sse_event("error", {"message": "An error occurred during the search. Please try again."})
+
+@app.post("/api/rag-search/stream")
+async def rag_search_stream(request_data: RAGSearchRequest):
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured.")
+    if not request_data.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty.")
+    return StreamingResponse(
+        stream_rag_answer(request_data.query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/cache-stats")
+def cache_stats():
+    return {
+        "news": article_store.stats(),
+        "query_embeddings": query_embedder.stats(),
+        "summary": {**summary_cache.stats(), "shared_inflight": summary_flight.shared},
+        "summary_prewarm": summary_prewarmer.stats(),
+        "tts": audio_cache.stats(),
+        "translation": {**translation_cache.stats(), **translation_stats},
+        "lexical_index": {**lexical_index.stats(), "enabled": HYBRID_SEARCH}
+    }
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus exposition: stage, route and upstream latency histograms plus queue and cache gauges."""
+    gauges = [
+        ("newz_queue_depth", {"queue": "indexing"}, indexing_queue.stats()["queue_depth"]),
+        ("newz_queue_depth", {"queue": "indexing_pending_articles"}, indexing_queue.stats()["pending_articles"]),
+        ("newz_embedding_ready", {}, int(embedding_ready.is_set())),
+        ("newz_lexical_index_documents", {}, len(lexical_index)),
+    ]
+    for name, executor in (("retrieval", retrieval_executor), ("tts", tts_executor), ("translation", translation_executor),
+                           ("cache", cache_executor)):
+        gauges.append(("newz_queue_depth", {"queue": f"{name}_pool"}, executor._work_queue.qsize()))
+    caches = {
+        "news": article_store.stats(),
+        "query_embeddings": query_embedder.stats(),
+        "summary": summary_cache.stats(),
+        "tts": audio_cache.stats(),
+        "translation": translation_cache.stats(),
+    }
+    for name, stats in caches.items():
+        gauges.append(("newz_cache_hit_ratio", {"cache": name}, stats["hit_ratio"]))
+        gauges.append(("newz_cache_entries", {"cache": name}, stats.get("size", stats.get("files", 0))))
+    return Response(Metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/http-stats")
+def http_stats():
+    return Http.stats()
+
+@app.get("/api/indexing-stats")
+def indexing_stats():
+    return indexing_queue.stats()
+
 @app.get("/api/debug-count")
 def debug_count():
     try:
-        collection = Collection("news_articles")
-        collection.load()
-        return {"row_count": collection.num_entities}
+        return {"row_count": run_with_collection(lambda collection: collection.num_entities)}
     except Exception as e:
         return {"error": str(e)}
 
@@ -305,6 +841,13 @@ def debug_count():
 def health_check():
     return {"status": "ok", "message": "API is healthy"}
 
+@app.get("/api/ready")
+def readiness_check():
+    """503 until the embedding model is loaded and warmed, so traffic isn't routed to a cold instance."""
+    if not embedding_ready.is_set():
+        raise HTTPException(status_code=503, detail={"status": "warming_up", **embedding_status})
+    return {"status": "ready", **embedding_status}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("Main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
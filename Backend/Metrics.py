@@ -0,0 +1,128 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Stage timings of the current request, collected only while a Server-Timing header is wanted.
+_request_timings: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_timings", default=None)
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed upper bounds in seconds."""
+
+    def __init__(self, buckets: list[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets + [float("inf")], self.counts):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            return {"count": self.count, "sum": round(self.sum, 4), "errors": self.errors, "buckets": cumulative}
+
+
+# metric name -> (label name, {label value: histogram})
+_families: dict[str, tuple[str, dict[str, LatencyHistogram]]] = {}
+_families_lock = threading.Lock()
+
+
+def histogram(name: str, label: str, value: str) -> LatencyHistogram:
+    """Returns the histogram for one label value of a metric family, creating it on first use."""
+    with _families_lock:
+        _, members = _families.setdefault(name, (label, {}))
+        if value not in members:
+            members[value] = LatencyHistogram()
+        return members[value]
+
+
+def family(name: str) -> dict[str, LatencyHistogram]:
+    with _families_lock:
+        return dict(_families.get(name, ("", {}))[1])
+
+
+def record_timing(name: str, seconds: float):
+    """Adds a stage to the current request's Server-Timing header, if one is being collected."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    """Times a block into the per-stage histogram and the request's Server-Timing entries."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        seconds = time.perf_counter() - started
+        histogram("newz_stage_duration_seconds", "stage", stage).observe(seconds, error=failed)
+        record_timing(stage, seconds)
+
+
+def start_request_timing() -> contextvars.Token:
+    return _request_timings.set([])
+
+
+def finish_request_timing(token: contextvars.Token) -> str:
+    """Resets the request's collector and returns its Server-Timing header value."""
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    totals: dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def _labels(pairs: dict) -> str:
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in pairs.items())
+    return f"{{{inner}}}" if inner else ""
+
+
+def render(gauges: list[tuple[str, dict, float]]) -> str:
+    """
+    Prometheus text exposition of every histogram family plus the given gauge samples,
+    each a (metric name, labels, value) tuple.
+    """
+    lines = []
+    with _families_lock:
+        families = {name: (label, dict(members)) for name, (label, members) in _families.items()}
+    for name, (label, members) in sorted(families.items()):
+        errors_name = name.removesuffix("_seconds") + "_errors_total"
+        lines.append(f"# TYPE {name} histogram")
+        error_lines = [f"# TYPE {errors_name} counter"]
+        for value, hist in sorted(members.items()):
+            snapshot = hist.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"{name}_bucket{_labels({label: value, 'le': bound})} {count}")
+            lines.append(f"{name}_sum{_labels({label: value})} {snapshot['sum']}")
+            lines.append(f"{name}_count{_labels({label: value})} {snapshot['count']}")
+            error_lines.append(f"{errors_name}{_labels({label: value})} {snapshot['errors']}")
+        lines.extend(error_lines)
+
+    typed = set()
+    for name, labels, value in sorted(gauges, key=lambda gauge: gauge[0]):
+        if name not in typed:
+            lines.append(f"# TYPE {name} gauge")
+            typed.add(name)
+        lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
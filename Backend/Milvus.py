@@ -1,28 +1,104 @@
 import os
+import json
+import hashlib
 import logging
-from functools import lru_cache
-from sentence_transformers import SentenceTransformer
+import threading
+import time
 from pymilvus import connections, utility, Collection, FieldSchema, CollectionSchema, DataType
+from pymilvus.exceptions import ConnectionNotExistException, MilvusUnavailableException
+
+from Embeddings import QueryEmbedder, OnnxEncoder
+from TimeFilter import published_epoch, build_time_expr
+from Lexical import BM25Index
+from VectorStore import LocalCollection, ReplicatedCollection
+import Metrics
 
 logger = logging.getLogger("uvicorn")
 
 # --- MODIFIED: Read Zilliz Cloud credentials from environment variables ---
 MILVUS_URI = os.getenv("MILVUS_URI")
 MILVUS_TOKEN = os.getenv("MILVUS_TOKEN")
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_BATCH_WAIT_MS = float(os.getenv("QUERY_EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# "torch" (sentence-transformers) or "onnx" (ONNX Runtime, int8-quantized export).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Chunk-level indexing: overlapping word windows sized to fit MiniLM's 256-token limit.
+CHUNK_INDEXING = os.getenv("CHUNK_INDEXING", "false").lower() == "true"
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "150"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", "30"))
+CHUNK_SEARCH_FACTOR = int(os.getenv("CHUNK_SEARCH_FACTOR", "4"))
+# Hybrid search: an in-process BM25 index kept in step with insert_articles.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"
+LEXICAL_BOOTSTRAP_BATCH = int(os.getenv("LEXICAL_BOOTSTRAP_BATCH", "1000"))
+# "milvus", "local" (embedded index on disk, no Milvus needed) or "replica" (local reads in front of Milvus).
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "milvus" if MILVUS_URI else "local").lower()
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(os.path.dirname(__file__), "vector_store"))
 # --- End of Modification ---
 
 COLLECTION_NAME = "news_articles"
+CHUNK_COLLECTION_NAME = "news_article_chunks"
 embedding_dimension = 384
+# Max primary keys per `source_url in [...]` lookup expression.
+DEDUP_LOOKUP_BATCH = 500
 
+# Errors after which the shared collection handle is rebuilt from a fresh connection.
+CONNECTION_ERRORS = (ConnectionNotExistException, MilvusUnavailableException, ConnectionError)
 
-@lru_cache(maxsize=1)
-def get_embedding_model():
-    """Loads and returns the sentence-transformer model."""
-    logger.info("Loading sentence-transformer model 'all-MiniLM-L6-v2'...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+_collections: dict = {}
+_collection_lock = threading.Lock()
+
+
+# Set once the embedding model is loaded and has run a warm-up batch.
+embedding_ready = threading.Event()
+embedding_status = {"backend": EMBEDDING_BACKEND, "ready": False, "load_seconds": None, "error": None}
+
+
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+
+def load_embedding_model(backend: str = EMBEDDING_BACKEND):
+    """Builds a fresh 'all-MiniLM-L6-v2' encoder for the given backend ("torch" or "onnx")."""
+    logger.info(f"Loading embedding model 'all-MiniLM-L6-v2' ({backend} backend)...")
+    if backend == "onnx":
+        model = OnnxEncoder(file_name=EMBEDDING_ONNX_FILE, threads=EMBEDDING_THREADS)
+    else:
+        # Imported here so the ONNX backend never pays for loading torch.
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer('all-MiniLM-L6-v2')
     logger.info("Embedding model loaded successfully.")
     return model
 
+
+def get_embedding_model():
+    """
+    Returns the process-wide encoder, loading it on first use.
+    The load is locked so the startup warm-up, the indexing worker and RAG requests share one model.
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = load_embedding_model()
+    return _embedding_model
+
+
+def warm_up_embedding_model():
+    """Loads the model and runs one batch so the first real request doesn't pay for it."""
+    started = time.perf_counter()
+    try:
+        generate_embeddings(["warm-up"] * 2)
+    except Exception as e:
+        embedding_status["error"] = str(e)
+        logger.error(f"Embedding model warm-up failed: {e}")
+        return
+    embedding_status.update(ready=True, error=None, load_seconds=round(time.perf_counter() - started, 2))
+    embedding_ready.set()
+    logger.info(f"Embedding model warmed up in {embedding_status['load_seconds']}s.")
+
 # --- MODIFIED: This function now connects to Zilliz Cloud ---
 def get_milvus_connection():
     """Establishes a connection to Milvus if one doesn't exist."""
@@ -49,7 +125,9 @@ def create_milvus_collection_if_not_exists():
             FieldSchema(name="source_url", dtype=DataType.VARCHAR, max_length=1024, is_primary=True),
             FieldSchema(name="author", dtype=DataType.VARCHAR, max_length=256),
             FieldSchema(name="published_at", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="published_ts", dtype=DataType.INT64),
             FieldSchema(name="source_name", dtype=DataType.VARCHAR, max_length=256),
+            FieldSchema(name="content_hash", dtype=DataType.VARCHAR, max_length=64),
             FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384)
         ]
         schema = CollectionSchema(fields, description="A collection for storing news article embeddings", primary_field="source_url")
@@ -61,6 +139,7 @@ def create_milvus_collection_if_not_exists():
             "params": {"nlist": 128}
         }
         collection.create_index(field_name="embedding", index_params=index_params)
+        collection.create_index(field_name="published_ts", index_name="published_ts_idx", index_params={"index_type": "STL_SORT"})
         logger.info(f"Collection '{COLLECTION_NAME}' created and indexed successfully.")
     else:
         logger.info(f"Collection '{COLLECTION_NAME}' already exists.")
@@ -70,28 +149,218 @@ def create_milvus_collection_if_not_exists():
     return collection
 
 
-def generate_embeddings(texts: list[str]) -> list[list[float]]:
+def create_chunk_collection_if_not_exists():
+    """Companion collection holding one row per article chunk, linked by source_url."""
+    get_milvus_connection()
+    if not utility.has_collection(CHUNK_COLLECTION_NAME):
+        logger.info(f"Collection '{CHUNK_COLLECTION_NAME}' not found. Creating new collection...")
+
+        fields = [
+            FieldSchema(name="chunk_id", dtype=DataType.VARCHAR, max_length=1100, is_primary=True),
+            FieldSchema(name="source_url", dtype=DataType.VARCHAR, max_length=1024),
+            FieldSchema(name="chunk_index", dtype=DataType.INT64),
+            FieldSchema(name="chunk_text", dtype=DataType.VARCHAR, max_length=8192),
+            FieldSchema(name="published_at", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="published_ts", dtype=DataType.INT64),
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=384)
+        ]
+        schema = CollectionSchema(fields, description="Overlapping chunks of news articles", primary_field="chunk_id")
+
+        collection = Collection(name=CHUNK_COLLECTION_NAME, schema=schema)
+        index_params = {
+            "metric_type": "L2",
+            "index_type": "IVF_FLAT",
+            "params": {"nlist": 128}
+        }
+        collection.create_index(field_name="embedding", index_params=index_params)
+        collection.create_index(field_name="published_ts", index_name="published_ts_idx", index_params={"index_type": "STL_SORT"})
+        logger.info(f"Collection '{CHUNK_COLLECTION_NAME}' created and indexed successfully.")
+
+    collection = Collection(name=CHUNK_COLLECTION_NAME)
+    collection.load()
+    return collection
+
+
+_COLLECTION_FACTORIES = {
+    COLLECTION_NAME: create_milvus_collection_if_not_exists,
+    CHUNK_COLLECTION_NAME: create_chunk_collection_if_not_exists,
+}
+
+# Primary key, fields and filterable fields (kept in memory) of each collection, for the embedded backend.
+_LOCAL_SCHEMAS = {
+    COLLECTION_NAME: ("source_url", ["title", "article_text", "source_url", "author", "published_at",
+                                     "published_ts", "source_name", "content_hash", "embedding"],
+                      ["published_ts"]),
+    CHUNK_COLLECTION_NAME: ("chunk_id", ["chunk_id", "source_url", "chunk_index", "chunk_text",
+                                         "published_at", "published_ts", "embedding"],
+                            ["source_url", "chunk_index", "published_ts"]),
+}
+# Fields a replica sync compares to decide which rows to copy from Milvus.
+_SYNC_COMPARE_FIELDS = {
+    COLLECTION_NAME: ["content_hash"],
+    CHUNK_COLLECTION_NAME: ["chunk_text"],
+}
+# Local collections outlive reset_collection(); only the Milvus side reconnects.
+_local_collections: dict = {}
+
+
+def get_local_collection(name: str) -> LocalCollection:
+    collection = _local_collections.get(name)
+    if collection is None:
+        primary_field, fields, filter_fields = _LOCAL_SCHEMAS[name]
+        collection = LocalCollection(os.path.join(VECTOR_STORE_DIR, name), primary_field, fields,
+                                     dim=embedding_dimension, filter_fields=filter_fields)
+        _local_collections[name] = collection
+    return collection
+
+
+def open_collection(name: str):
+    """Builds the handle for VECTOR_BACKEND: Milvus, the embedded store, or Milvus behind a local replica."""
+    if VECTOR_BACKEND == "local":
+        return get_local_collection(name)
+    collection = _COLLECTION_FACTORIES[name]()
+    if VECTOR_BACKEND == "replica":
+        return ReplicatedCollection(collection, get_local_collection(name))
+    return collection
+
+
+def close_local_collections():
+    for collection in _local_collections.values():
+        collection.close()
+    _local_collections.clear()
+
+
+def sync_replicas():
+    """
+    Brings the local replicas up to date with Milvus, on every startup; until a replica has
+    synced in this process its reads go to Milvus.
+    """
+    for name in list(_collections):
+        collection = _collections[name]
+        if isinstance(collection, ReplicatedCollection) and not collection.synced:
+            try:
+                collection.sync(output_fields=_LOCAL_SCHEMAS[name][1], compare_fields=_SYNC_COMPARE_FIELDS[name])
+            except Exception as e:
+                logger.error(f"Syncing the local replica of '{name}' failed, reads stay on Milvus: {e}")
+
+
+def get_collection(name: str = COLLECTION_NAME):
+    """
+    Returns the process-wide handle for a collection, creating and loading it on first use.
+    Later calls reuse it with no metadata round trips.
+    """
+    collection = _collections.get(name)
+    if collection is None:
+        with _collection_lock:
+            collection = _collections.get(name)
+            if collection is None:
+                collection = open_collection(name)
+                _collections[name] = collection
+    return collection
+
+
+def reset_collection():
+    """Drops the cached handles and connection so the next call reconnects and reloads."""
+    with _collection_lock:
+        _collections.clear()
+        if VECTOR_BACKEND == "local":
+            return
+        try:
+            connections.disconnect("default")
+        except Exception as e:
+            logger.warning(f"Milvus disconnect failed: {e}")
+
+
+def run_with_collection(operation, name: str = COLLECTION_NAME):
+    """Runs operation(collection), reconnecting and retrying once after a connection error."""
+    try:
+        return operation(get_collection(name))
+    except CONNECTION_ERRORS as e:
+        logger.warning(f"Milvus connection error, reconnecting: {e}")
+        reset_collection()
+        return operation(get_collection(name))
+
+
+def generate_embeddings(texts: list[str], batch_size: int = EMBED_BATCH_SIZE) -> list[list[float]]:
     """Generates vector embeddings for a list of texts."""
     model = get_embedding_model()
-    return model.encode(texts, convert_to_tensor=False).tolist()
+    with Metrics.timed("embed"):
+        return model.encode(texts, batch_size=batch_size).tolist()
 
-def insert_articles(articles: list[dict]):
+
+# Query vectors for RAG search: LRU-cached and micro-batched across concurrent requests.
+query_embedder = QueryEmbedder(
+    generate_embeddings,
+    maxsize=QUERY_EMBEDDING_CACHE_SIZE,
+    max_wait=QUERY_EMBEDDING_BATCH_WAIT_MS / 1000
+)
+
+# Lexical leg of hybrid search (only filled when HYBRID_SEARCH is on).
+lexical_index = BM25Index()
+
+
+def bootstrap_lexical_index():
     """
-    Inserts a batch of articles into the Milvus collection.
-    Each article must be a dict with keys: title, article_text, source_url.
-    Embeddings will be generated automatically.
+    Loads every stored article into the BM25 index so hybrid search works right after a restart.
+    Pages through the collection with a query iterator; runs off the event loop at startup.
     """
-    if not articles:
-        logger.warning("No articles provided for insertion.")
+    def load(collection) -> int:
+        iterator = collection.query_iterator(
+            batch_size=LEXICAL_BOOTSTRAP_BATCH,
+            expr='source_url != ""',
+            output_fields=["title", "article_text", "source_url", "published_at"]
+        )
+        loaded = 0
+        try:
+            while batch := iterator.next():
+                lexical_index.add_many(batch)
+                loaded += len(batch)
+        finally:
+            iterator.close()
+        return loaded
+
+    try:
+        loaded = run_with_collection(load)
+    except Exception as e:
+        logger.error(f"Loading the lexical index failed, hybrid search covers only new articles: {e}")
         return
+    logger.info(f"Loaded {loaded} articles into the lexical index.")
 
-    collection = create_milvus_collection_if_not_exists()
 
-    texts = [item["article_text"] for item in articles]
-    embeddings = generate_embeddings(texts)
- 
-    entities = [
-        {
+def compute_content_hash(item: dict) -> str:
+    """Hash of the fields that feed the stored entity, used to detect changed articles."""
+    payload = f"{item.get('title', '')}\x1f{item.get('article_text', '')}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _has_field(collection, field_name: str) -> bool:
+    return any(f.name == field_name for f in collection.schema.fields)
+
+
+def fetch_existing_hashes(collection, urls: list[str]) -> dict:
+    """
+    Looks up which of the given primary keys are already stored, in bulk.
+    Returns a dict of source_url -> content hash.
+    Collections created before content_hash existed are hashed from their stored text.
+    """
+    has_hash_field = _has_field(collection, "content_hash")
+    output_fields = ["source_url", "content_hash"] if has_hash_field else ["source_url", "title", "article_text"]
+    existing = {}
+    for i in range(0, len(urls), DEDUP_LOOKUP_BATCH):
+        batch = urls[i:i + DEDUP_LOOKUP_BATCH]
+        rows = collection.query(expr=f"source_url in {json.dumps(batch)}", output_fields=output_fields)
+        for row in rows:
+            existing[row["source_url"]] = row["content_hash"] if has_hash_field else compute_content_hash(row)
+    return existing
+
+
+def build_entities(collection, items: list[dict], embeddings: list, hashes: dict = None) -> list[dict]:
+    """Rows for the articles collection; content_hash and published_ts are set only if the collection has them."""
+    include_hash = _has_field(collection, "content_hash")
+    include_ts = _has_field(collection, "published_ts")
+    entities = []
+    for item, emb in zip(items, embeddings):
+        entity = {
             "title": item.get("title", "No Title"),
             "article_text": item.get("article_text"),
             "source_url": item.get("source_url"),
@@ -100,41 +369,266 @@ def insert_articles(articles: list[dict]):
             "source_name": item.get("source_name", "Unknown"),
             "embedding": emb
         }
-        for item, emb in zip(articles, embeddings)
-    ]
+        if include_hash:
+            entity["content_hash"] = hashes[item["source_url"]] if hashes else compute_content_hash(item)
+        if include_ts:
+            entity["published_ts"] = published_epoch(item.get("published_at"))
+        entities.append(entity)
+    return entities
+
+
+def insert_articles(articles: list[dict]):
+    """
+    Inserts a batch of articles into the Milvus collection.
+    Each article must be a dict with keys: title, article_text, source_url.
+    Articles already stored with identical content are skipped; embeddings are
+    generated only for new or changed ones.
+    """
+    if not articles:
+        logger.warning("No articles provided for insertion.")
+        return
+
+    collection = get_collection()
+
+    # Collapse duplicate URLs within the batch, keeping the latest copy.
+    by_url = {item["source_url"]: item for item in articles if item.get("source_url")}
+    hashes = {url: compute_content_hash(item) for url, item in by_url.items()}
 
     try:
+        with Metrics.timed("dedup_lookup"):
+            existing = run_with_collection(lambda c: fetch_existing_hashes(c, list(by_url)))
+    except Exception as e:
+        logger.warning(f"Dedup lookup failed, re-embedding the whole batch: {e}")
+        existing = {}
+
+    pending = [item for url, item in by_url.items() if existing.get(url) != hashes[url]]
+    skipped = len(by_url) - len(pending)
+    duplicates = len(articles) - len(by_url)
+    if not pending:
+        logger.info(f"Upserted 0 articles into Milvus (skipped {skipped} unchanged, {duplicates} duplicate or without URL).")
+        if HYBRID_SEARCH:
+            lexical_index.add_many(list(by_url.values()))
+        return
+
+    texts = [item["article_text"] for item in pending]
+    embeddings = generate_embeddings(texts)
+    # Chunks go first: if they fail, the articles are stored without a content hash so the
+    # next ingest sees them as changed and retries their chunks instead of skipping them.
+    if CHUNK_INDEXING and not index_article_chunks(pending):
+        hashes = {**hashes, **{item["source_url"]: "" for item in pending}}
+    entities = build_entities(collection, pending, embeddings, hashes)
+
+    def upsert_and_flush(collection):
         collection.upsert(entities)
         collection.flush()
-        logger.info(f"Upserted {len(articles)} articles into Milvus.")
+
+    try:
+        with Metrics.timed("upsert"):
+            run_with_collection(upsert_and_flush)
+        logger.info(f"Upserted {len(entities)} articles into Milvus (skipped {skipped} unchanged, {duplicates} duplicate or without URL).")
     except Exception as e:
         logger.error(f"Failed to upsert articles into Milvus: {e}")
+        return
+    # Only now are all of them stored, so BM25 never returns articles Milvus doesn't have.
+    if HYBRID_SEARCH:
+        lexical_index.add_many(list(by_url.values()))
 
 
-def search_similar_articles(query_text: str, top_k: int = 3, expr: str = None) -> list:
-    """Searches Milvus for articles similar to the query text with an optional filter."""
-    collection = Collection(name=COLLECTION_NAME)
-    collection.load()
-    query_embedding = generate_embeddings([query_text])[0]
+def time_filter_expr(collection, since=None, until=None, expr: str = None):
+    """
+    Combines expr with a published-time window. Uses the indexed INT64 published_ts field;
+    collections created before it existed fall back to comparing published_at strings.
+    """
+    if _has_field(collection, "published_ts"):
+        time_expr = build_time_expr(since, until)
+    else:
+        clauses = []
+        if since is not None:
+            clauses.append(f"published_at >= '{since.strftime('%Y-%m-%dT%H:%M:%SZ')}'")
+        if until is not None:
+            clauses.append(f"published_at < '{until.strftime('%Y-%m-%dT%H:%M:%SZ')}'")
+        time_expr = " and ".join(clauses) or None
+    parts = [f"({e})" for e in (expr, time_expr) if e]
+    return " and ".join(parts) or None
+
+
+def split_into_chunks(text: str, chunk_words: int = CHUNK_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> list[str]:
+    """Splits text into overlapping windows of chunk_words words."""
+    words = (text or "").split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap_words)
+    return [" ".join(words[start:start + chunk_words]) for start in range(0, max(1, len(words) - overlap_words), step)]
+
+
+def index_article_chunks(articles: list[dict]) -> bool:
+    """
+    Embeds every chunk of the given articles in large batches and replaces their rows in the chunk collection.
+    Returns whether the chunks were written.
+    """
+    rows = []
+    for item in articles:
+        for i, chunk_text in enumerate(split_into_chunks(item.get("article_text", ""))):
+            rows.append({
+                "chunk_id": f"{item['source_url']}#{i}",
+                "source_url": item["source_url"],
+                "chunk_index": i,
+                "chunk_text": chunk_text,
+                "published_at": item.get("published_at", ""),
+                "published_ts": published_epoch(item.get("published_at"))
+            })
+    if not rows:
+        return True
+
+    embeddings = generate_embeddings([row["chunk_text"] for row in rows])
+    for row, emb in zip(rows, embeddings):
+        row["embedding"] = emb
+    urls = [item["source_url"] for item in articles]
 
+    def replace_chunks(collection):
+        # A changed article may now have fewer chunks; drop its old ones first.
+        for i in range(0, len(urls), DEDUP_LOOKUP_BATCH):
+            collection.delete(expr=f"source_url in {json.dumps(urls[i:i + DEDUP_LOOKUP_BATCH])}")
+        collection.upsert(rows)
+        collection.flush()
+
+    try:
+        with Metrics.timed("chunk_upsert"):
+            run_with_collection(replace_chunks, CHUNK_COLLECTION_NAME)
+        logger.info(f"Upserted {len(rows)} chunks for {len(articles)} articles into Milvus.")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to upsert article chunks into Milvus: {e}")
+        return False
+
+
+def fetch_chunked_urls(urls: list[str]) -> set:
+    """Which of the given articles have rows in the chunk collection (every chunked article has chunk 0)."""
+    chunked = set()
+    for i in range(0, len(urls), DEDUP_LOOKUP_BATCH):
+        batch = urls[i:i + DEDUP_LOOKUP_BATCH]
+        rows = run_with_collection(lambda collection: collection.query(
+            expr=f"source_url in {json.dumps(batch)} and chunk_index == 0",
+            output_fields=["source_url"]
+        ), CHUNK_COLLECTION_NAME)
+        chunked.update(row["source_url"] for row in rows)
+    return chunked
+
+
+def search_article_chunks(query_embedding: list[float], top_k: int, expr: str = None, include_embeddings: bool = False,
+                          since=None, until=None) -> list:
+    """
+    Searches the chunk collection and folds the hits back into articles.
+    Each article is ranked by its best chunk and carries its matching passages in order.
+    """
     search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+    output_fields = ["source_url", "chunk_index", "chunk_text"]
+    if include_embeddings:
+        output_fields.append("embedding")
+
+    with Metrics.timed("search"):
+        results = run_with_collection(lambda collection: collection.search(
+            data=[query_embedding],
+            anns_field="embedding",
+            param=search_params,
+            limit=top_k * CHUNK_SEARCH_FACTOR,
+            expr=time_filter_expr(collection, since, until, expr),
+            output_fields=output_fields
+        ), CHUNK_COLLECTION_NAME)
 
-    results = collection.search(
-        data=[query_embedding],
-        anns_field="embedding",
-        param=search_params,
-        limit=top_k,
-        expr=expr,
-        output_fields=["title", "article_text", "source_url", "published_at"]
-    )
+    groups = {}
+    for hit in results[0]:
+        url = hit.entity.get('source_url')
+        group = groups.setdefault(url, {"distance": hit.distance, "embedding": hit.entity.get('embedding'), "passages": []})
+        group["passages"].append((hit.entity.get('chunk_index'), hit.entity.get('chunk_text')))
+    urls = sorted(groups, key=lambda url: groups[url]["distance"])[:top_k]
+    if not urls:
+        return []
+
+    with Metrics.timed("parent_lookup"):
+        rows = run_with_collection(lambda collection: collection.query(
+            expr=f"source_url in {json.dumps(urls)}",
+            output_fields=["title", "article_text", "source_url", "published_at"]
+        ))
+    parents = {row["source_url"]: row for row in rows}
+
+    retrieved_articles = []
+    for url in urls:
+        parent = parents.get(url)
+        if parent is None:
+            continue
+        group = groups[url]
+        article = {
+            "title": parent.get('title'),
+            "content": parent.get('article_text'),
+            "url": url,
+            "published_at": parent.get('published_at'),
+            "similarity_score": group["distance"],
+            "passages": [text for _, text in sorted(group["passages"])]
+        }
+        if include_embeddings:
+            article["embedding"] = group["embedding"]
+        retrieved_articles.append(article)
+    return retrieved_articles
+
+
+def search_similar_articles(query_text: str, top_k: int = 3, expr: str = None, include_embeddings: bool = False,
+                            since=None, until=None) -> list:
+    """
+    Searches Milvus for articles similar to the query text with an optional filter
+    and an optional published-time window (since/until datetimes, pruned server-side).
+    With include_embeddings, each hit also carries its stored vector for re-ranking.
+    """
+    with Metrics.timed("query_embed"):
+        query_embedding = query_embedder.embed(query_text)
+    if not CHUNK_INDEXING:
+        return search_article_rows(query_embedding, top_k, expr=expr, include_embeddings=include_embeddings,
+                                   since=since, until=until)
+
+    chunk_hits = search_article_chunks(query_embedding, top_k, expr=expr, include_embeddings=include_embeddings,
+                                       since=since, until=until)
+    # Articles stored before chunk indexing was turned on (or whose chunks failed to write) have
+    # no chunk rows; the article collection still covers them until backfill.py --chunks runs.
+    seen = {article["url"] for article in chunk_hits}
+    candidates = [article for article in search_article_rows(query_embedding, top_k, expr=expr,
+                                                             include_embeddings=include_embeddings,
+                                                             since=since, until=until)
+                  if article["url"] not in seen]
+    if candidates:
+        with Metrics.timed("chunk_lookup"):
+            chunked = fetch_chunked_urls([article["url"] for article in candidates])
+        chunk_hits += [article for article in candidates if article["url"] not in chunked]
+    return sorted(chunk_hits, key=lambda article: article["similarity_score"])[:top_k]
+
+
+def search_article_rows(query_embedding: list[float], top_k: int, expr: str = None, include_embeddings: bool = False,
+                        since=None, until=None) -> list:
+    """Searches the articles collection directly, one hit per article."""
+    search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
+    output_fields = ["title", "article_text", "source_url", "published_at"]
+    if include_embeddings:
+        output_fields.append("embedding")
+
+    with Metrics.timed("search"):
+        results = run_with_collection(lambda collection: collection.search(
+            data=[query_embedding],
+            anns_field="embedding",
+            param=search_params,
+            limit=top_k,
+            expr=time_filter_expr(collection, since, until, expr),
+            output_fields=output_fields
+        ))
 
     retrieved_articles = []
     for hit in results[0]:
-        retrieved_articles.append({
+        article = {
             "title": hit.entity.get('title'),
             "content": hit.entity.get('article_text'),
             "url": hit.entity.get('source_url'),
             "published_at": hit.entity.get('published_at'),
             "similarity_score": hit.distance
-        })
+        }
+        if include_embeddings:
+            article["embedding"] = hit.entity.get('embedding')
+        retrieved_articles.append(article)
     return retrieved_articles
\ No newline at end of file
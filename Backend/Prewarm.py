@@ -0,0 +1,88 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("uvicorn")
+
+
+class SummaryPrewarmer:
+    """
+    Generates summaries for the top headlines before anyone clicks them.
+    Calls run with bounded concurrency and draw from a requests-per-minute budget;
+    work that doesn't fit in the budget is skipped rather than queued.
+    """
+
+    def __init__(self, summarize: Callable[[str, str], Awaitable[dict]], is_cached: Callable[[str, str], Awaitable[bool]],
+                 languages: list[str], top_n: int = 5, concurrency: int = 2, per_minute: int = 30):
+        self.summarize = summarize
+        self.is_cached = is_cached
+        self.languages = languages
+        self.top_n = top_n
+        self.concurrency = max(1, concurrency)
+        self.per_minute = max(1, per_minute)
+        self._semaphore = None
+        self._tokens = float(self.per_minute)
+        self._refilled_at = time.monotonic()
+        self._scheduled: set[tuple[str, str]] = set()
+        self.generated = 0
+        self.already_cached = 0
+        self.skipped_budget = 0
+        self.failures = 0
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._refilled_at) * self.per_minute / 60)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _warm_one(self, text: str, language: str):
+        async with self._semaphore:
+            try:
+                if await self.is_cached(text, language):
+                    self.already_cached += 1
+                    return
+                if not self._take_token():
+                    self.skipped_budget += 1
+                    return
+                await self.summarize(text, language)
+                self.generated += 1
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Summary pre-warm failed ({language}): {e}")
+
+    async def prewarm(self, articles: list[dict], category: str = "general"):
+        """Summarizes the first top_n articles in every configured language."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        jobs = []
+        for article in articles[:self.top_n]:
+            text = article.get("description")
+            if not text:
+                continue
+            for language in self.languages:
+                key = (text, language)
+                if key in self._scheduled:
+                    continue
+                self._scheduled.add(key)
+                jobs.append(key)
+
+        try:
+            await asyncio.gather(*(self._warm_one(text, language) for text, language in jobs))
+        finally:
+            self._scheduled.difference_update(jobs)
+        if jobs:
+            logger.info(f"Pre-warmed summaries for '{category}': {len(jobs)} jobs, {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "generated": self.generated,
+            "already_cached": self.already_cached,
+            "skipped_budget": self.skipped_budget,
+            "failures": self.failures,
+            "in_progress": len(self._scheduled),
+        }
@@ -0,0 +1,73 @@
+import math
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from TimeFilter import parse_published_at
+
+
+def recency_scores(candidates: list[dict], half_life_hours: float, now: Optional[datetime] = None) -> np.ndarray:
+    """Exponential decay in [0, 1] by article age; undated articles score 0."""
+    now = now or datetime.now(timezone.utc)
+    scores = np.zeros(len(candidates), dtype=np.float32)
+    for i, candidate in enumerate(candidates):
+        published = parse_published_at(candidate.get("published_at"))
+        if published is not None:
+            age_hours = max(0.0, (now - published).total_seconds() / 3600)
+            scores[i] = math.exp(-math.log(2) * age_hours / half_life_hours)
+    return scores
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], k: int = 60) -> list[dict]:
+    """
+    Fuses ranked hit lists by summing 1 / (k + rank) per URL.
+    Returns one hit per URL (fields merged, first list wins) with an 'rrf_score', best first.
+    """
+    fused: dict[str, dict] = {}
+    for hits in result_lists:
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.setdefault(hit["url"], {**hit, "rrf_score": 0.0})
+            for key, value in hit.items():
+                entry.setdefault(key, value)
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda hit: hit["rrf_score"], reverse=True)
+
+
+def mmr_rerank(query_embedding: list[float], candidates: list[dict], top_k: int, diversity: float = 0.3,
+               recency_weight: float = 0.1, half_life_hours: float = 72.0, relevance: Optional[list[float]] = None) -> list[dict]:
+    """
+    Re-ranks over-fetched hits with Maximal Marginal Relevance plus a recency boost.
+    Candidates carry their 'embedding'; ones without (e.g. lexical-only hits) count as
+    dissimilar to everything. relevance overrides the query cosine score (e.g. fused ranks).
+    All similarities come from one normalized matrix product; the greedy MMR loop only
+    does vector updates.
+    """
+    if len(candidates) <= 1:
+        return candidates[:top_k]
+
+    dim = len(query_embedding)
+    docs = np.asarray([c.get("embedding") or [0.0] * dim for c in candidates], dtype=np.float32)
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+
+    relevance = docs @ query if relevance is None else np.asarray(relevance, dtype=np.float32)
+    relevance = relevance + recency_weight * recency_scores(candidates, half_life_hours)
+    similarity = docs @ docs.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of each candidate to anything already selected.
+    max_sim = similarity[selected[0]].copy()
+    remaining = np.ones(len(candidates), dtype=bool)
+    remaining[selected[0]] = False
+
+    while len(selected) < min(top_k, len(candidates)):
+        scores = (1 - diversity) * relevance - diversity * max_sim
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining[best] = False
+        np.maximum(max_sim, similarity[best], out=max_sim)
+
+    return [candidates[i] for i in selected]
@@ -0,0 +1,101 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+UNITS = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1), "month": timedelta(days=30)}
+
+RELATIVE = re.compile(r"\b(?:in the |over the )?(?:past|last)\s+(\d+\s+)?(hour|day|week|month)s?\b")
+TODAY = re.compile(r"\btoday\b")
+YESTERDAY = re.compile(r"\byesterday\b")
+ISO_DATE = r"(\d{4}-\d{2}-\d{2})"
+SINCE_DATE = re.compile(rf"\b(?:since|after|from)\s+{ISO_DATE}\b")
+BEFORE_DATE = re.compile(rf"\b(?:before|until)\s+{ISO_DATE}\b")
+ON_DATE = re.compile(rf"\b(?:on\s+)?{ISO_DATE}\b")
+
+
+def parse_published_at(value: Optional[str]) -> Optional[datetime]:
+    """Parses NewsAPI's ISO-8601 timestamps; returns None for 'Unknown' or malformed values."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def published_epoch(value: Optional[str]) -> int:
+    """Epoch seconds for the INT64 published_ts field; 0 when the date is unknown."""
+    parsed = parse_published_at(value)
+    return int(parsed.timestamp()) if parsed else 0
+
+
+def _date(text: str) -> Optional[datetime]:
+    """Midnight UTC of a YYYY-MM-DD date; None for impossible dates like 2025-02-30."""
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _names_today(query: str) -> bool:
+    """
+    True when "today" in the original query reads as part of a name, like "USA Today": the word
+    before it is capitalized, and it isn't merely the query's first word (unless "Today" is too).
+    """
+    for match in re.finditer(r"\btoday\b", query, re.IGNORECASE):
+        before = query[:match.start()].split()
+        if before and before[-1][:1].isupper() and (len(before) > 1 or match.group(0)[0].isupper()):
+            return True
+    return False
+
+
+def parse_time_filter(query: str, now: Optional[datetime] = None) -> tuple[str, Optional[datetime], Optional[datetime]]:
+    """
+    Pulls a time window out of a natural-language query.
+    Understands "past/last [N] hours|days|weeks|months", "today", "yesterday",
+    "since|after|from YYYY-MM-DD", "before|until YYYY-MM-DD" and "on YYYY-MM-DD".
+    Returns (query without the time phrase, since, until); either bound may be None.
+    """
+    now = now or datetime.now(timezone.utc)
+    text = query.lower()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    since = until = None
+
+    if match := RELATIVE.search(text):
+        count = int(match.group(1)) if match.group(1) else 1
+        since = now - count * UNITS[match.group(2)]
+    elif (match := TODAY.search(text)) and not _names_today(query):
+        since = midnight
+    elif match := YESTERDAY.search(text):
+        since, until = midnight - timedelta(days=1), midnight
+    else:
+        since_match, before_match = SINCE_DATE.search(text), BEFORE_DATE.search(text)
+        # Phrases with impossible dates stay in the query as ordinary text.
+        since_match = since_match if since_match and _date(since_match.group(1)) else None
+        before_match = before_match if before_match and _date(before_match.group(1)) else None
+        if since_match or before_match:
+            since = _date(since_match.group(1)) if since_match else None
+            until = _date(before_match.group(1)) if before_match else None
+            for m in (since_match, before_match):
+                if m:
+                    text = text.replace(m.group(0), " ")
+            return " ".join(text.split()), since, until
+        if (match := ON_DATE.search(text)) and (since := _date(match.group(1))):
+            until = since + timedelta(days=1)
+        else:
+            match = None
+
+    if match:
+        text = text.replace(match.group(0), " ")
+    return " ".join(text.split()), since, until
+
+
+def build_time_expr(since: Optional[datetime], until: Optional[datetime], field: str = "published_ts") -> Optional[str]:
+    """Milvus filter expression over the INT64 epoch field."""
+    clauses = []
+    if since is not None:
+        clauses.append(f"{field} >= {int(since.timestamp())}")
+    if until is not None:
+        clauses.append(f"{field} < {int(until.timestamp())}")
+    return " and ".join(clauses) or None
@@ -0,0 +1,410 @@
+import os
+import re
+import ast
+import json
+import logging
+import sqlite3
+import threading
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger("uvicorn")
+
+COMPARISON = re.compile(r"^(\w+)\s*(==|!=|>=|<=|>|<)\s*(.+)$")
+MEMBERSHIP = re.compile(r"^(\w+)\s+in\s+(\[.*\])$")
+OPERATORS = {
+    "==": lambda a, b: a == b, "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, "<": lambda a, b: a < b,
+}
+
+
+class StoreLockedError(RuntimeError):
+    """The local store's directory is locked by another process."""
+
+
+def lock_directory(directory: str):
+    """
+    Takes an exclusive, non-blocking lock on directory for the life of the returned file.
+    Raises StoreLockedError if another process already holds it.
+    """
+    handle = open(os.path.join(directory, ".lock"), "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        raise StoreLockedError(
+            f"Vector store {directory} is already open in another process (another API worker or backfill.py?). "
+            "The local store has a single writer; run one process, or use VECTOR_BACKEND=milvus."
+        )
+    return handle
+
+
+def compile_expr(expr: Optional[str], fields=None):
+    """
+    Compiles the Milvus filter expressions this backend builds ("field in [...]" and comparisons
+    against literals, joined with "and") into a row predicate. Anything else, or a field outside
+    fields (when given), raises ValueError.
+    """
+    if not expr or not expr.strip():
+        return lambda row: True
+    if " or " in expr or " not " in expr:
+        raise ValueError(f"Unsupported filter expression: {expr}")
+
+    tests = []
+    for clause in expr.split(" and "):
+        clause = clause.strip().strip("()").strip()
+        if match := MEMBERSHIP.match(clause):
+            field, values = match.group(1), set(json.loads(match.group(2)))
+            test = lambda row, f=field, v=values: row.get(f) in v
+        elif match := COMPARISON.match(clause):
+            field, op, literal = match.groups()
+            value = ast.literal_eval(literal.strip())
+            test = lambda row, f=field, o=OPERATORS[op], v=value: row.get(f) is not None and o(row.get(f), v)
+        else:
+            raise ValueError(f"Unsupported filter clause: {clause}")
+        if fields is not None and field not in fields:
+            raise ValueError(f"Field '{field}' is not filterable here: {clause}")
+        tests.append(test)
+    return lambda row: all(test(row) for test in tests)
+
+
+class LocalHit:
+    """Search hit shaped like pymilvus' Hit (id, distance, entity.get)."""
+    __slots__ = ("id", "distance", "entity")
+
+    def __init__(self, pk: str, distance: float, entity: dict):
+        self.id = pk
+        self.distance = distance
+        self.entity = entity
+
+
+class LocalQueryIterator:
+    """Pages through a query like pymilvus' QueryIterator; next() returns [] once exhausted."""
+
+    def __init__(self, collection: "LocalCollection", pks: list[str], output_fields, batch_size: int):
+        self.collection = collection
+        self.pks = pks
+        self.output_fields = output_fields
+        self.batch_size = batch_size
+        self.position = 0
+
+    def next(self) -> list[dict]:
+        batch = self.pks[self.position:self.position + self.batch_size]
+        self.position += len(batch)
+        return self.collection._entities(batch, self.output_fields)
+
+    def close(self):
+        self.pks = []
+
+
+class LocalCollection:
+    """
+    Embedded collection implementing the subset of pymilvus' Collection the backend uses
+    (schema, load, query, search, query_iterator, upsert, delete, flush, num_entities).
+    Vectors live in a memory-mapped float32 matrix searched exactly with squared L2,
+    matching the Milvus index metric; the other fields sit in a SQLite table keyed by the
+    primary field. Only filter_fields are mirrored in memory for filtering; the rest are read
+    from SQLite for the rows actually returned. Both persist under directory.
+    Single-writer: opening takes an exclusive lock on directory, so a second process
+    (another API worker, backfill.py) fails at open instead of corrupting the slot map.
+    """
+
+    def __init__(self, directory: str, primary_field: str, fields: list[str], vector_field: str = "embedding",
+                 dim: int = 384, initial_capacity: int = 1024, filter_fields: Optional[list[str]] = None):
+        os.makedirs(directory, exist_ok=True)
+        self._dir_lock = lock_directory(directory)
+        self.primary_field = primary_field
+        self.vector_field = vector_field
+        self.dim = dim
+        self.schema = SimpleNamespace(fields=[SimpleNamespace(name=name) for name in fields])
+        if filter_fields is None:
+            filter_fields = [name for name in fields if name != vector_field]
+        self.filter_fields = list(dict.fromkeys([primary_field, *filter_fields]))
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "metadata.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (pk TEXT PRIMARY KEY, slot INTEGER NOT NULL, data TEXT NOT NULL)")
+        self._conn.commit()
+
+        if not os.path.exists(self._vectors_path):
+            with open(self._vectors_path, "wb") as f:
+                f.truncate(initial_capacity * dim * 4)
+        self._open_vectors()
+
+        self._filters: dict[str, dict] = {}
+        self._slots: dict[str, int] = {}
+        extracted = [name for name in self.filter_fields if name != primary_field]
+        columns = "".join(f", json_extract(data, '$.{name}')" for name in extracted)
+        for pk, slot, *values in self._conn.execute(f"SELECT pk, slot{columns} FROM rows"):
+            self._filters[pk] = {primary_field: pk, **dict(zip(extracted, values))}
+            self._slots[pk] = slot
+        self._size = max(self._slots.values(), default=-1) + 1
+        self._pks: list[Optional[str]] = [None] * self._size
+        for pk, slot in self._slots.items():
+            self._pks[slot] = pk
+        self._free = [slot for slot, pk in enumerate(self._pks) if pk is None]
+        # Squared norms and liveness per slot, sized to the matrix capacity.
+        self._norms = np.einsum("ij,ij->i", self._vectors, self._vectors)
+        self._live = np.zeros(self._vectors.shape[0], dtype=bool)
+        self._live[list(self._slots.values())] = True
+        logger.info(f"Opened local collection at {directory} with {len(self._slots)} rows.")
+
+    def _open_vectors(self):
+        capacity = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _allocate_slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = self._size
+        if slot >= self._vectors.shape[0]:
+            # Double the backing file; the memmap has to be reopened at the new size.
+            self._vectors.flush()
+            new_capacity = max(1, self._vectors.shape[0]) * 2
+            del self._vectors
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(new_capacity * self.dim * 4)
+            self._open_vectors()
+            grown = new_capacity - len(self._norms)
+            self._norms = np.concatenate([self._norms, np.zeros(grown, dtype=np.float32)])
+            self._live = np.concatenate([self._live, np.zeros(grown, dtype=bool)])
+        self._size += 1
+        self._pks.append(None)
+        return slot
+
+    @property
+    def num_entities(self) -> int:
+        return len(self._slots)
+
+    def pks(self) -> set:
+        with self._lock:
+            return set(self._slots)
+
+    def stored_values(self, fields: list[str]) -> dict:
+        """{pk: (values of fields...)} for every row, read from SQLite."""
+        columns = ", ".join(f"json_extract(data, '$.{name}')" for name in fields)
+        with self._lock:
+            return {pk: tuple(values) for pk, *values in self._conn.execute(f"SELECT pk, {columns} FROM rows")}
+
+    def load(self):
+        pass
+
+    def upsert(self, rows: list[dict]):
+        with self._lock:
+            records = []
+            for row in rows:
+                pk = row[self.primary_field]
+                slot = self._slots.get(pk)
+                if slot is None:
+                    slot = self._allocate_slot()
+                    self._slots[pk] = slot
+                    self._pks[slot] = pk
+                    self._live[slot] = True
+                vector = np.asarray(row[self.vector_field], dtype=np.float32)
+                self._vectors[slot] = vector
+                self._norms[slot] = vector @ vector
+                data = {k: v for k, v in row.items() if k != self.vector_field}
+                self._filters[pk] = {field: data.get(field) for field in self.filter_fields}
+                records.append((pk, slot, json.dumps(data)))
+            self._conn.executemany("INSERT OR REPLACE INTO rows (pk, slot, data) VALUES (?, ?, ?)", records)
+            self._conn.commit()
+
+    def delete(self, expr: str):
+        predicate = compile_expr(expr, self.filter_fields)
+        with self._lock:
+            self.delete_pks([pk for pk, row in self._filters.items() if predicate(row)])
+
+    def delete_pks(self, pks):
+        with self._lock:
+            doomed = [pk for pk in pks if pk in self._slots]
+            for pk in doomed:
+                slot = self._slots.pop(pk)
+                del self._filters[pk]
+                self._pks[slot] = None
+                self._live[slot] = False
+                self._free.append(slot)
+            self._conn.executemany("DELETE FROM rows WHERE pk = ?", [(pk,) for pk in doomed])
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._vectors.flush()
+
+    def _entities(self, pks: list[str], output_fields) -> list[dict]:
+        """
+        Entities for the given keys in order, skipping any deleted since they were listed.
+        Fields not mirrored in memory are read from SQLite, 500 keys per query.
+        """
+        with self._lock:
+            pks = [pk for pk in pks if pk in self._slots]
+            stored = {}
+            if any(field not in self.filter_fields and field != self.vector_field for field in output_fields):
+                for i in range(0, len(pks), 500):
+                    batch = pks[i:i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    for pk, data in self._conn.execute(f"SELECT pk, data FROM rows WHERE pk IN ({placeholders})", batch):
+                        stored[pk] = json.loads(data)
+            entities = []
+            for pk in pks:
+                row = stored.get(pk) or self._filters[pk]
+                entity = {field: row.get(field) for field in output_fields if field != self.vector_field}
+                if self.vector_field in output_fields:
+                    entity[self.vector_field] = self._vectors[self._slots[pk]].tolist()
+                entity[self.primary_field] = pk
+                entities.append(entity)
+            return entities
+
+    def query_iterator(self, batch_size: int = 1000, expr: Optional[str] = None, output_fields: list[str] = (), **kwargs):
+        predicate = compile_expr(expr, self.filter_fields)
+        with self._lock:
+            pks = [pk for pk, row in self._filters.items() if predicate(row)]
+        return LocalQueryIterator(self, pks, output_fields, batch_size)
+
+    def query(self, expr: str, output_fields: list[str] = (), limit: Optional[int] = None, **kwargs) -> list[dict]:
+        predicate = compile_expr(expr, self.filter_fields)
+        with self._lock:
+            pks = []
+            for pk, row in self._filters.items():
+                if predicate(row):
+                    pks.append(pk)
+                    if limit and len(pks) >= limit:
+                        break
+            return self._entities(pks, output_fields)
+
+    def search(self, data, anns_field: str, param: dict, limit: int, expr: Optional[str] = None,
+               output_fields: list[str] = (), **kwargs) -> list[list[LocalHit]]:
+        predicate = compile_expr(expr, self.filter_fields)
+        with self._lock:
+            if not self._slots:
+                return [[] for _ in data]
+            matrix = self._vectors[:self._size]
+            live = self._live[:self._size]
+            results = []
+            for query in np.asarray(data, dtype=np.float32):
+                # Squared L2 from norms: |x|^2 - 2x.q + |q|^2, one matrix-vector product.
+                distances = self._norms[:self._size] - 2 * (matrix @ query) + query @ query
+                distances[~live] = np.inf
+                if expr:
+                    order = np.argsort(distances)
+                else:
+                    k = min(limit, len(distances))
+                    top = np.argpartition(distances, k - 1)[:k]
+                    order = top[np.argsort(distances[top])]
+                matches = []
+                for slot in order:
+                    if len(matches) >= limit or not np.isfinite(distances[slot]):
+                        break
+                    pk = self._pks[slot]
+                    if predicate(self._filters[pk]):
+                        matches.append((pk, float(distances[slot])))
+                entities = self._entities([pk for pk, _ in matches], output_fields)
+                results.append([LocalHit(pk, distance, entity) for (pk, distance), entity in zip(matches, entities)])
+            return results
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._conn.close()
+            self._dir_lock.close()
+
+
+class ReplicatedCollection:
+    """
+    Milvus collection fronted by a LocalCollection replica. Writes go to both; reads are served
+    locally once sync() has brought the replica up to date with Milvus in this process, and
+    fall through to Milvus until then, so writes made elsewhere while it was down are not missed.
+    """
+
+    def __init__(self, primary, replica: LocalCollection):
+        self.primary = primary
+        self.replica = replica
+        self.synced = False
+        # Keys written while a sync runs, which the sync must not treat as stale.
+        self._written_during_sync: Optional[set] = None
+
+    @property
+    def schema(self):
+        return self.primary.schema
+
+    @property
+    def num_entities(self) -> int:
+        return self.primary.num_entities
+
+    def _reader(self):
+        return self.replica if self.synced else self.primary
+
+    def sync(self, output_fields: list[str], compare_fields: list[str] = (), batch_size: int = 1000):
+        """
+        Brings the replica up to date with Milvus, then switches reads over. Lists every remote key
+        with compare_fields only, copies the full rows (vectors included) of keys that are missing
+        locally or whose compare_fields differ, and drops local rows Milvus no longer has.
+        Without compare_fields that the remote schema has, every row is copied.
+        """
+        pk = self.replica.primary_field
+        remote_fields = {field.name for field in self.primary.schema.fields}
+        compare_fields = [field for field in compare_fields if field in remote_fields]
+        before = self.replica.pks()
+        local = self.replica.stored_values(compare_fields) if compare_fields else {}
+        seen, changed = set(), []
+        self._written_during_sync = set()
+        try:
+            iterator = self.primary.query_iterator(batch_size=batch_size, expr=f'{pk} != ""',
+                                                   output_fields=[pk, *compare_fields])
+            try:
+                while batch := iterator.next():
+                    for row in batch:
+                        seen.add(row[pk])
+                        if not compare_fields or local.get(row[pk]) != tuple(row.get(field) for field in compare_fields):
+                            changed.append(row[pk])
+            finally:
+                iterator.close()
+            for i in range(0, len(changed), batch_size):
+                keys = changed[i:i + batch_size]
+                self.replica.upsert(self.primary.query(expr=f"{pk} in {json.dumps(keys)}", output_fields=output_fields))
+        finally:
+            written, self._written_during_sync = self._written_during_sync, None
+        stale = before - seen - written
+        self.replica.delete_pks(stale)
+        self.replica.flush()
+        self.synced = True
+        logger.info(f"Local replica in step with Milvus: {len(seen)} rows, {len(changed)} copied, {len(stale)} stale dropped.")
+
+    def load(self):
+        self.primary.load()
+
+    def upsert(self, rows: list[dict]):
+        self.primary.upsert(rows)
+        self.replica.upsert(rows)
+        written = self._written_during_sync
+        if written is not None:
+            written.update(row[self.replica.primary_field] for row in rows)
+
+    def delete(self, expr: str):
+        self.primary.delete(expr=expr)
+        self.replica.delete(expr)
+
+    def flush(self):
+        self.primary.flush()
+        self.replica.flush()
+
+    def query(self, *args, **kwargs):
+        return self._reader().query(*args, **kwargs)
+
+    def query_iterator(self, *args, **kwargs):
+        return self._reader().query_iterator(*args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self._reader().search(*args, **kwargs)
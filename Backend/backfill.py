@@ -0,0 +1,237 @@
+"""
+Bulk backfill of the articles collection from JSONL/NDJSON dumps, without going through the API.
+
+    python backfill.py dumps/2025-*.jsonl --workers 4 --checkpoint backfill.ckpt.json
+    python backfill.py dump.ndjson --skip-unchanged
+    python backfill.py --chunks
+
+Each line is one NewsAPI article object or a whole NewsAPI response ({"articles": [...]}).
+Articles go through process_articles_for_indexing, embedding is sharded across a process pool
+(one model per worker), rows are upserted in large batches and the collection is flushed once
+at the end. With --checkpoint, the last fully upserted line of every file is recorded after each
+upsert, and a rerun resumes after it; upserts are keyed by URL, so replaying a batch is harmless.
+
+Uses the same MILVUS_URI / EMBEDDING_BACKEND settings as the API, and never writes into a store a
+running API has open: with VECTOR_BACKEND=replica it writes to Milvus only (API replicas pick the
+rows up on their next startup sync), and with VECTOR_BACKEND=local it refuses to run while the
+API holds the store's directory lock, so stop the API first.
+Dumps only fill the articles collection. --chunks then pages through it and writes chunk rows
+(CHUNK_INDEXING) for every stored article that has none yet, e.g. after turning the flag on.
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import Milvus
+from Ingestion import process_articles_for_indexing
+from VectorStore import StoreLockedError
+
+
+# --- Worker side ---
+def init_worker(threads: int):
+    """Pins each worker's BLAS/ONNX threads so workers don't oversubscribe the CPU, then loads the model."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    Milvus.EMBEDDING_THREADS = threads
+    Milvus.get_embedding_model()
+
+
+def embed_texts(texts: list[str], batch_size: int) -> list[list[float]]:
+    return Milvus.generate_embeddings(texts, batch_size=batch_size)
+
+
+# --- Checkpoints ---
+def load_checkpoint(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Writes atomically so an interrupted run never leaves a truncated checkpoint."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# --- Reading ---
+def read_batches(paths: list[str], checkpoint: dict, batch_size: int, progress: dict):
+    """
+    Yields (articles, marks) batches of about batch_size processed articles, cut only at line
+    boundaries; marks maps each file to the last line fully contained in the batches so far.
+    """
+    batch, marks = [], {}
+    for path in paths:
+        start = checkpoint.get(path, 0)
+        if start:
+            print(f"Resuming {path} after line {start}.", flush=True)
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if line_no <= start or not line.strip():
+                    continue
+                progress["lines"] += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if not isinstance(record, dict):
+                    progress["bad_lines"] += 1
+                    continue
+                news_data = record if isinstance(record.get("articles"), list) else {"articles": [record]}
+                articles = [a for a in process_articles_for_indexing(news_data) if a.get("source_url")]
+                progress["skipped"] += len(news_data["articles"]) - len(articles)
+                batch.extend(articles)
+                marks[path] = line_no
+                if len(batch) >= batch_size:
+                    yield batch, dict(marks)
+                    batch = []
+    if batch or marks:
+        yield batch, dict(marks)
+
+
+# --- Progress ---
+def new_progress() -> dict:
+    return {"lines": 0, "bad_lines": 0, "skipped": 0, "unchanged": 0, "embedded": 0, "upserted": 0,
+            "started": time.perf_counter(), "last_report": 0.0}
+
+
+def report(progress: dict, final: bool = False):
+    elapsed = time.perf_counter() - progress["started"]
+    rate = progress["upserted"] / elapsed if elapsed else 0.0
+    print(
+        f"{'Done' if final else 'Progress'}: {progress['lines']} lines, {progress['embedded']} embedded, "
+        f"{progress['upserted']} upserted, {progress['unchanged']} unchanged, {progress['skipped']} without content, "
+        f"{progress['bad_lines']} bad lines | {rate:.1f} articles/s over {elapsed:.0f}s",
+        flush=True
+    )
+    progress["last_report"] = time.perf_counter()
+
+
+# --- Pipeline ---
+def drop_unchanged(collection, articles: list[dict], progress: dict) -> tuple[list[dict], dict]:
+    """Keeps articles whose content hash differs from the stored one (same check as insert_articles)."""
+    hashes = {a["source_url"]: Milvus.compute_content_hash(a) for a in articles}
+    existing = Milvus.run_with_collection(lambda c: Milvus.fetch_existing_hashes(c, list(hashes)))
+    pending = [a for a in articles if existing.get(a["source_url"]) != hashes[a["source_url"]]]
+    progress["unchanged"] += len(articles) - len(pending)
+    return pending, hashes
+
+
+def backfill(args):
+    checkpoint = load_checkpoint(args.checkpoint)
+    collection = Milvus.get_collection()
+    progress = new_progress()
+    buffer: dict[str, dict] = {}  # source_url -> entity, so one upsert never carries a key twice
+    pending_marks: dict[str, int] = {}
+    in_flight = deque()
+
+    def write_buffer():
+        rows = list(buffer.values())
+        if rows:
+            Milvus.run_with_collection(lambda c: c.upsert(rows))
+        progress["upserted"] += len(rows)
+        buffer.clear()
+        checkpoint.update(pending_marks)
+        if args.checkpoint:
+            save_checkpoint(args.checkpoint, checkpoint)
+
+    def drain_one():
+        articles, marks, hashes, future = in_flight.popleft()
+        embeddings = future.result() if future is not None else []
+        for entity in Milvus.build_entities(collection, articles, embeddings, hashes):
+            buffer[entity["source_url"]] = entity
+        progress["embedded"] += len(articles)
+        # Batches drain in submission order, so these lines are complete once the buffer is written.
+        pending_marks.update(marks)
+        if len(buffer) >= args.upsert_batch:
+            write_buffer()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=init_worker, initargs=(args.threads,)) as pool:
+        for articles, marks in read_batches(args.paths, checkpoint, args.batch_size, progress):
+            hashes = None
+            if args.skip_unchanged and articles:
+                articles, hashes = drop_unchanged(collection, articles, progress)
+            future = None
+            if articles:
+                future = pool.submit(embed_texts, [a["article_text"] for a in articles], args.embed_batch_size)
+            in_flight.append((articles, marks, hashes, future))
+            # Keep every worker busy without reading the whole dump into memory.
+            while len(in_flight) > args.workers * 2:
+                drain_one()
+            if time.perf_counter() - progress["last_report"] >= args.progress_every:
+                report(progress)
+        while in_flight:
+            drain_one()
+        if buffer or pending_marks:
+            write_buffer()
+
+    print("Flushing collection...", flush=True)
+    Milvus.run_with_collection(lambda c: c.flush())
+    report(progress, final=True)
+
+
+def backfill_chunks(args):
+    """Indexes the chunks of stored articles missing from the chunk collection, one page at a time."""
+    progress = new_progress()
+    iterator = Milvus.get_collection().query_iterator(
+        batch_size=args.batch_size,
+        expr='source_url != ""',
+        output_fields=["source_url", "article_text", "published_at"]
+    )
+    try:
+        while articles := iterator.next():
+            progress["lines"] += len(articles)
+            chunked = Milvus.fetch_chunked_urls([a["source_url"] for a in articles])
+            missing = [a for a in articles if a["source_url"] not in chunked]
+            progress["unchanged"] += len(articles) - len(missing)
+            if missing and Milvus.index_article_chunks(missing):
+                progress["embedded"] += len(missing)
+                progress["upserted"] += len(missing)
+            if time.perf_counter() - progress["last_report"] >= args.progress_every:
+                report(progress)
+    finally:
+        iterator.close()
+    report(progress, final=True)
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 2
+    parser = argparse.ArgumentParser(description="Bulk-load JSONL/NDJSON article dumps into the articles collection.")
+    parser.add_argument("paths", nargs="*", help="JSONL/NDJSON files, processed in the given order.")
+    parser.add_argument("--chunks", action="store_true",
+                        help="Instead of reading dumps, write chunk rows for stored articles that have none.")
+    parser.add_argument("--workers", type=int, default=max(1, cpus // 2), help="Embedding processes.")
+    parser.add_argument("--threads", type=int, default=0, help="Threads per worker (default: CPUs / workers).")
+    parser.add_argument("--batch-size", type=int, default=512, help="Articles per embedding task.")
+    parser.add_argument("--embed-batch-size", type=int, default=Milvus.EMBED_BATCH_SIZE, help="Model batch size.")
+    parser.add_argument("--upsert-batch", type=int, default=5000, help="Rows per upsert call.")
+    parser.add_argument("--checkpoint", help="JSON file recording progress; reruns resume from it.")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="Skip articles already stored with the same content (not for a model change).")
+    parser.add_argument("--progress-every", type=float, default=10, help="Seconds between progress lines.")
+    args = parser.parse_args()
+    if not args.chunks and not args.paths:
+        parser.error("give at least one dump file, or --chunks")
+    if Milvus.VECTOR_BACKEND == "replica":
+        # The local replicas belong to the API processes; only the shared Milvus is written here.
+        Milvus.VECTOR_BACKEND = "milvus"
+    try:
+        if args.chunks:
+            backfill_chunks(args)
+        else:
+            args.threads = args.threads or max(1, cpus // args.workers)
+            backfill(args)
+    except StoreLockedError as e:
+        raise SystemExit(f"{e}\nStop the API before backfilling a local store.")
@@ -0,0 +1,350 @@
+"""
+Offline benchmark for the backend hot paths.
+
+Runs the FastAPI app in-process (httpx ASGI transport, no sockets) with local stand-ins for
+NewsAPI, Gemini, the translator and gTTS, and the embedded local vector store in place of Milvus.
+Reports p50/p95/p99 latency, requests per second and process RSS per endpoint and concurrency
+level, insert_articles throughput, and embedding throughput per batch size.
+
+    python benchmark.py
+    python benchmark.py --concurrency 1,8,32 --requests 400 --embedder hash --json bench.json
+
+--embedder real uses the configured EMBEDDING_BACKEND and needs the model in the local
+Hugging Face cache; --embedder hash swaps in deterministic pseudo-vectors so only the
+surrounding code is measured. Stand-in latencies are fixed, so runs are comparable.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+import tempfile
+import resource
+from types import SimpleNamespace
+
+import numpy as np
+
+# Configure the app for an offline run before it is imported.
+BENCH_DIR = tempfile.mkdtemp(prefix="newz-bench-")
+os.environ.update({
+    "GEMINI_API_KEY": "bench",
+    "NEWS_API_KEY": "bench",
+    "CHUNK_INDEXING": "false",
+    "SUMMARY_PREWARM_ENABLED": "false",
+    "SUMMARY_CACHE_PATH": os.path.join(BENCH_DIR, "summary_cache.sqlite3"),
+    "TRANSLATION_CACHE_PATH": os.path.join(BENCH_DIR, "translation_cache.sqlite3"),
+    "TTS_CACHE_DIR": os.path.join(BENCH_DIR, "tts_cache"),
+    "VECTOR_BACKEND": "local",
+    "VECTOR_STORE_DIR": os.path.join(BENCH_DIR, "vector_store"),
+})
+os.environ.pop("MILVUS_URI", None)
+
+import httpx
+
+import Http
+import Milvus
+import Main
+
+WORDS = ("market government energy election climate league vaccine startup court storm rates chip "
+         "ceasefire budget merger satellite drought tariff striker inflation protest launch museum").split()
+CATEGORIES = ["business", "general", "health", "science", "sports", "technology"]
+
+
+# --- Stand-ins ---
+def hash_embeddings(texts: list[str], batch_size: int = 64) -> list[list[float]]:
+    """Deterministic unit vectors seeded from the text, for measuring everything but the model."""
+    vectors = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(Milvus.embedding_dimension).astype(np.float32)
+        vectors.append((vector / np.linalg.norm(vector)).tolist())
+    return vectors
+
+
+class FakeGeminiModel:
+    latency = 0.05
+    # A well-formed answer to the summary prompt, so /api/summary exercises its success and cache paths.
+    summary = json.dumps({
+        "summary": "Bench summary.", "background": "Bench background.", "sentiment": "neutral", "bias": "none",
+        "confidence": 0.9, "readTime": "1 min", "context": "Bench context.", "relevance": "high",
+        "nextSteps": "None.", "wordCount": 120,
+    })
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        await asyncio.sleep(self.latency)
+        if "Required keys: summary" in prompt:
+            return SimpleNamespace(text=self.summary)
+        return SimpleNamespace(text=" ".join(prompt.split()[-40:]))
+
+
+class FakeTranslator:
+    latency = 0.02
+
+    def __init__(self, source: str, target: str):
+        self.target = target
+
+    def translate(self, text: str) -> str:
+        time.sleep(self.latency)
+        return f"[{self.target}] {text}"
+
+
+class FakeTTS:
+    latency = 0.02
+
+    def __init__(self, text: str, lang: str = "en"):
+        self.parts = max(1, text.count(".") + 1)
+
+    def stream(self):
+        for _ in range(self.parts):
+            time.sleep(self.latency)
+            yield b"\xff\xf3" + os.urandom(2046)
+
+
+def make_corpus(size: int, rng: random.Random, prefix: str = "bench") -> list[dict]:
+    """NewsAPI-shaped articles with deterministic text and spread-out publish times."""
+    now = time.time()
+    articles = []
+    for i in range(size):
+        words = rng.choices(WORDS, k=120)
+        published = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - rng.randint(0, 14 * 86400)))
+        articles.append({
+            "source": {"id": None, "name": f"Source {i % 17}"},
+            "author": f"Author {i % 31}",
+            "title": " ".join(words[:8]).capitalize(),
+            "description": " ".join(words[8:40]).capitalize() + ".",
+            "content": ". ".join(" ".join(words[j:j + 12]).capitalize() for j in range(40, 120, 12)) + ".",
+            "url": f"https://news.example/{prefix}/{i}",
+            "publishedAt": published,
+        })
+    return articles
+
+
+def install_stand_ins(corpus: list[dict], args):
+    FakeGeminiModel.latency = args.gemini_ms / 1000
+    FakeTranslator.latency = args.translate_ms / 1000
+    FakeTTS.latency = args.tts_ms / 1000
+    newsapi_latency = args.newsapi_ms / 1000
+
+    payload = {"status": "ok", "totalResults": len(corpus), "articles": corpus[:100]}
+
+    def newsapi(request: httpx.Request) -> httpx.Response:
+        time.sleep(newsapi_latency)
+        return httpx.Response(200, json=payload)
+
+    async def newsapi_async(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(newsapi_latency)
+        return httpx.Response(200, json=payload)
+
+    Http._client = httpx.Client(transport=httpx.MockTransport(newsapi))
+    Http._async_client = httpx.AsyncClient(transport=httpx.MockTransport(newsapi_async))
+
+    Main.genai = SimpleNamespace(GenerativeModel=FakeGeminiModel)
+    Main.PooledGoogleTranslator = FakeTranslator
+    Main.gTTS = FakeTTS
+
+    if args.embedder == "hash":
+        Milvus.generate_embeddings = hash_embeddings
+        Main.generate_embeddings = hash_embeddings
+        Milvus.query_embedder.encode = hash_embeddings
+
+
+# --- Measurement ---
+def rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize_latencies(latencies: list[float], errors: int, elapsed: float, rss_before: float) -> dict:
+    ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+
+
+async def run_level(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Issues total requests from concurrency workers and times each one."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, kwargs = make_request(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                await response.aread()
+                if response.is_error:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_latencies(latencies, errors, time.perf_counter() - started, rss_before)
+
+
+def endpoint_scenarios(corpus: list[dict], rng: random.Random, distinct: int) -> dict:
+    """Request factories per endpoint. Payloads cycle through `distinct` variants, so caches see repeats."""
+    queries = [" ".join(rng.choices(WORDS, k=5)) for _ in range(distinct)]
+    texts = [article["content"] for article in corpus[:distinct]]
+    return {
+        "news": lambda i: ("GET", "/api/news", {"params": {"category": CATEGORIES[i % len(CATEGORIES)], "page": 1 + i % 3}}),
+        "rag-search": lambda i: ("POST", "/api/rag-search", {"json": {"query": queries[i % distinct]}}),
+        "summary": lambda i: ("POST", "/api/summary", {"json": {"text": texts[i % len(texts)], "language": "en"}}),
+        "translate": lambda i: ("POST", "/api/translate", {"json": {
+            "texts": [texts[(i + j) % len(texts)][:200] for j in range(5)], "targetLang": "hi"}}),
+        "tts": lambda i: ("POST", "/api/tts", {"json": {
+            "title": corpus[i % distinct]["title"], "summary": corpus[i % distinct]["description"], "language": "en"}}),
+    }
+
+
+def reset_caches():
+    """Starts every concurrency level cold, so levels are comparable."""
+    Main.summary_cache.clear()
+    Main.translation_cache.clear()
+    Main.audio_cache.clear()
+    Milvus.query_embedder.clear()
+
+
+def bench_inserts(rng: random.Random, batch_sizes: list[int], batches: int) -> list[dict]:
+    """insert_articles throughput for fresh batches, then for re-sent (unchanged, skipped) batches."""
+    results = []
+    for batch_size in batch_sizes:
+        corpus = make_corpus(batch_size * batches, rng, prefix=f"insert-{batch_size}")
+        items = Main.process_articles_for_indexing({"articles": corpus})
+        for label in ("new", "unchanged"):
+            rss_before = rss_mb()
+            latencies = []
+            started = time.perf_counter()
+            for i in range(0, len(items), batch_size):
+                batch_started = time.perf_counter()
+                Milvus.insert_articles(items[i:i + batch_size])
+                latencies.append(time.perf_counter() - batch_started)
+            elapsed = time.perf_counter() - started
+            result = summarize_latencies(latencies, 0, elapsed, rss_before)
+            result.update(batch_size=batch_size, kind=label, articles_per_s=round(len(items) / elapsed, 1))
+            results.append(result)
+    return results
+
+
+def bench_encode(corpus: list[dict], batch_sizes: list[int]) -> list[dict]:
+    texts = [article["content"] for article in corpus]
+    results = []
+    for batch_size in batch_sizes:
+        started = time.perf_counter()
+        Milvus.generate_embeddings(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        results.append({"batch_size": batch_size, "texts": len(texts), "texts_per_s": round(len(texts) / elapsed, 1)})
+    return results
+
+
+def print_table(title: str, rows: list[dict]):
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print(f"\n== {title} ==")
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    corpus = make_corpus(args.corpus_size, rng)
+    install_stand_ins(corpus, args)
+    report = {"config": vars(args), "endpoints": [], "insert_articles": [], "encode": []}
+
+    await Main.startup_event()
+    while not Milvus.embedding_ready.is_set():
+        if Milvus.embedding_status["error"]:
+            raise SystemExit(f"Embedding model failed to load: {Milvus.embedding_status['error']}")
+        await asyncio.sleep(0.1)
+    Milvus.insert_articles(Main.process_articles_for_indexing({"articles": corpus}))
+
+    try:
+        if "encode" in args.scenarios:
+            report["encode"] = bench_encode(corpus[:args.encode_texts], args.batch_sizes)
+            print_table("encode throughput", report["encode"])
+
+        if "insert" in args.scenarios:
+            report["insert_articles"] = bench_inserts(rng, args.batch_sizes, args.insert_batches)
+            print_table("insert_articles", report["insert_articles"])
+
+        scenarios = endpoint_scenarios(corpus, rng, args.distinct)
+        transport = httpx.ASGITransport(app=Main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, make_request in scenarios.items():
+                if name not in args.scenarios:
+                    continue
+                for concurrency in args.concurrency:
+                    reset_caches()
+                    result = await run_level(client, make_request, args.requests, concurrency)
+                    report["endpoints"].append({"endpoint": name, "concurrency": concurrency, **result})
+        print_table("endpoints", report["endpoints"])
+    finally:
+        await Main.shutdown_event()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    # Latencies of failed requests time the error path, not the endpoint; don't report them as a result.
+    failed = [f"{r['endpoint']} @ {r['concurrency']}: {r['errors']}/{r['requests']}" for r in report["endpoints"] if r["errors"]]
+    if failed:
+        raise SystemExit("Requests failed, results are not valid: " + "; ".join(failed))
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmark for the NewZ backend.")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","),
+                        default=["encode", "insert", "news", "rag-search", "summary", "translate", "tts"])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level.")
+    parser.add_argument("--distinct", type=int, default=50, help="Distinct payloads per endpoint.")
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 8, 32, 64, 128])
+    parser.add_argument("--corpus-size", type=int, default=500)
+    parser.add_argument("--encode-texts", type=int, default=256)
+    parser.add_argument("--insert-batches", type=int, default=4)
+    parser.add_argument("--embedder", choices=["real", "hash"], default="real")
+    parser.add_argument("--newsapi-ms", type=float, default=30)
+    parser.add_argument("--gemini-ms", type=float, default=50)
+    parser.add_argument("--translate-ms", type=float, default=20)
+    parser.add_argument("--tts-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the full report to this file.")
+    args = parser.parse_args()
+
+    logging.getLogger("uvicorn").setLevel(logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,81 @@
+"""
+The int8 ONNX encoder must stay close to the sentence-transformers (torch) embeddings it replaces.
+Skipped unless both backends' dependencies are installed and the model files are in the local
+Hugging Face cache, so it never downloads anything.
+
+    python -m pytest Backend/tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+pytest.importorskip("sentence_transformers")
+huggingface_hub = pytest.importorskip("huggingface_hub")
+
+from Embeddings import OnnxEncoder
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# Minimum cosine similarity between the two backends' vectors for the same text.
+MIN_COSINE = 0.97
+
+TEXTS = [
+    "Central bank holds interest rates steady as inflation cools.",
+    "Nvidia shares jump after record data-center revenue.",
+    "Heavy rain floods parts of Mumbai, disrupting local trains.",
+    "Scientists sequence the genome of a 10,000-year-old wolf.",
+    "India beat Australia by six wickets in the second Test.",
+    "Tariff talks between the U.S. and the EU stall again.",
+    "Short.",
+    " ".join(["A very long article body that exceeds the model's token limit."] * 60),
+]
+
+
+def cached(filename: str) -> bool:
+    return isinstance(huggingface_hub.try_to_load_from_cache(MODEL_ID, filename), str)
+
+
+pytestmark = pytest.mark.skipif(
+    not all(cached(f) for f in ("tokenizer.json", ONNX_FILE, "model.safetensors")),
+    reason="all-MiniLM-L6-v2 (torch and ONNX files) is not in the local Hugging Face cache",
+)
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    from sentence_transformers import SentenceTransformer
+
+    torch_vectors = SentenceTransformer("all-MiniLM-L6-v2").encode(TEXTS, batch_size=4)
+    onnx_vectors = OnnxEncoder(MODEL_ID, file_name=ONNX_FILE).encode(TEXTS, batch_size=4)
+    return np.asarray(torch_vectors, dtype=np.float32), onnx_vectors
+
+
+def test_shapes_match(embeddings):
+    torch_vectors, onnx_vectors = embeddings
+    assert onnx_vectors.shape == torch_vectors.shape == (len(TEXTS), 384)
+
+
+def test_onnx_vectors_are_normalized(embeddings):
+    _, onnx_vectors = embeddings
+    np.testing.assert_allclose(np.linalg.norm(onnx_vectors, axis=1), 1.0, atol=1e-4)
+
+
+def test_onnx_within_tolerance_of_torch(embeddings):
+    torch_vectors, onnx_vectors = embeddings
+    torch_vectors = torch_vectors / np.linalg.norm(torch_vectors, axis=1, keepdims=True)
+    cosines = np.sum(torch_vectors * onnx_vectors, axis=1)
+    assert cosines.min() >= MIN_COSINE, f"per-text cosine similarities: {np.round(cosines, 4).tolist()}"
+
+
+def test_onnx_preserves_nearest_neighbours(embeddings):
+    torch_vectors, onnx_vectors = embeddings
+    torch_nearest = np.argsort(-(torch_vectors @ torch_vectors.T), axis=1)[:, 1]
+    onnx_nearest = np.argsort(-(onnx_vectors @ onnx_vectors.T), axis=1)[:, 1]
+    assert (torch_nearest == onnx_nearest).mean() >= 0.75
@@ -53,7 +53,7 @@ const AiSearch = () => {
         controllerRef.current = controller;
 
         try {
-            const response = await fetch('/api/rag-search', {
+            const response = await fetch('/api/rag-search/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ query }),
@@ -65,8 +65,38 @@ const AiSearch = () => {
                 throw new Error(errorData.detail || 'The search failed. Please try again.');
             }
 
-            const data = await response.json();
-            setResult(data);
+            // Server-Sent Events: sources arrive first, then answer tokens as they are generated.
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let answer = '';
+            let sources = [];
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const messages = buffer.split('\n\n');
+                buffer = messages.pop();
+                for (const message of messages) {
+                    const eventLine = message.split('\n').find((line) => line.startsWith('event: '));
+                    const dataLine = message.split('\n').find((line) => line.startsWith('data: '));
+                    if (!eventLine || !dataLine) continue;
+                    const event = eventLine.slice(7);
+                    const data = JSON.parse(dataLine.slice(6));
+
+                    if (event === 'sources') {
+                        sources = data;
+                    } else if (event === 'token') {
+                        answer += data.text;
+                    } else if (event === 'error') {
+                        throw new Error(data.message);
+                    }
+                    setResult({ answer, sources });
+                    setIsLoading(false);
+                }
+            }
 
         } catch (err) {
             if (err.name !== 'AbortError') {
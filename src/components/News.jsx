@@ -32,6 +32,7 @@ export class News extends Component {
       translatedArticles: null,
       loading: false,
       page: 1,
+      nextCursor: null,
       totalResults: 0,
       hasMore: true,
       error: null,
@@ -116,6 +117,7 @@ export class News extends Component {
       const cachedData = newsCache.get(cacheKey);
       this.setState({
         articles: cachedData.articles,
+        nextCursor: cachedData.nextCursor,
         totalResults: cachedData.totalResults,
         hasMore: cachedData.articles.length < cachedData.totalResults,
         loading: false,
@@ -134,13 +136,15 @@ export class News extends Component {
       this.props.setProgress?.(10);
     }
 
-    const { page, query, source } = this.state;
+    const { page, nextCursor, query, source } = this.state;
     const envBase = import.meta.env.VITE_API_BASE;
     const baseUrl = envBase || '/api';
     const languageParam = 'en';
 
     const params = new URLSearchParams({
       country, category, page, pageSize, lang: languageParam,
+      // The cursor keeps later pages on the same snapshot as the first one.
+      ...(page > 1 && nextCursor && { cursor: nextCursor }),
       ...(query && { q: query }),
       ...(source !== 'all' && { sources: source })
     });
@@ -164,7 +168,7 @@ export class News extends Component {
         const newArticles = page === 1 ? data.articles : [...prevState.articles, ...data.articles];
 
         if (page === 1) {
-          newsCache.set(cacheKey, { articles: newArticles, totalResults: data.totalResults });
+          newsCache.set(cacheKey, { articles: newArticles, nextCursor: data.nextCursor, totalResults: data.totalResults });
         }
 
         if (this.state.language !== 'en') {
@@ -173,6 +177,7 @@ export class News extends Component {
 
         return {
           articles: newArticles,
+          nextCursor: data.nextCursor || null,
           totalResults: data.totalResults || 0,
           loading: false,
           hasMore: newArticles.length < (data.totalResults || 0),
@@ -222,7 +227,7 @@ export class News extends Component {
 
   componentDidUpdate(prevProps) {
     if (prevProps.category !== this.props.category || prevProps.country !== this.props.country) {
-      this.setState({ page: 1, articles: [], translatedArticles: null, hasMore: true }, () => {
+      this.setState({ page: 1, nextCursor: null, articles: [], translatedArticles: null, hasMore: true }, () => {
         this.updateNews();
       });
       document.title = `${this.capitalizeFirstLetter(this.props.category)} - NewsZ`;
@@ -13,7 +13,8 @@ prompt = "A cyberpunk city with glowing neon lights and flying cars."
 
 print("⏳ Generating image...")
 
-resp = requests.post(url, json={"prompt": {"text": prompt}})
+# Explicit (connect, read) timeouts so a hung upstream fails instead of hanging forever.
+resp = requests.post(url, json={"prompt": {"text": prompt}}, timeout=(5, 120))
 data = resp.json()
 
 if "error" in data: